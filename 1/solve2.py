@@ -1,31 +1,99 @@
 #!/usr/bin/env python3
 
+from itertools import islice
+import numpy as np
+
+CHUNK_SIZE = 2**16
+MEMO_SIZE = 2**20
+MAX_INT64 = np.iinfo(np.int64).max
+
+
+class FuelTable:
+    """
+    This class memoizes the total fuel of the masses below MEMO_SIZE in a
+    dense array indexed by mass, -1 marking masses not seen yet.  Lookups and
+    inserts are single gathers and scatters, and the memory is bounded however
+    many masses are streamed.  Larger masses are rarely repeated and are
+    computed directly.
+    """
+
+    def __init__(self):
+        self.fuels = np.full(MEMO_SIZE, -1, dtype=np.int64)
+
+    def get_fuel(self, masses):
+        """
+        Return the total fuel of each mass, computing only the masses missing
+        from the table in a single vectorized pass.
+        """
+        fuels = np.full_like(masses, -1)
+        memoized = (masses >= 0) & (masses < MEMO_SIZE)
+        fuels[memoized] = self.fuels[masses[memoized]]
+        missing = fuels < 0
+        fuels[missing] = get_fuel(masses[missing])
+        inserted = missing & memoized
+        self.fuels[masses[inserted]] = fuels[inserted]
+        return fuels
+
 
 def solve(weights):
-    cache = {}
-    return sum(get_fuel(weight, cache) for weight in weights)
+    """
+    The weights are streamed in chunks of CHUNK_SIZE.  Each distinct weight in
+    a chunk is looked up once in the fuel table, and its fuel is weighted by
+    its count in the chunk.
+    """
+    weights = iter(weights)
+    table = FuelTable()
+    total = 0
+
+    while True:
+        chunk = np.fromiter(islice(weights, CHUNK_SIZE), dtype=np.int64)
+
+        if chunk.shape[0] == 0:
+            return total
+
+        masses, counts = np.unique(chunk, return_counts=True)
+        total += get_sum(table.get_fuel(masses), counts)
+
+
+def get_fuel(weights):
+    """
+    Apply the fuel iteration to every weight at once until all the added fuel
+    is zero.  Each pass divides by 3, so there are about log3(max weight)
+    passes.  The total fuel is less than half the weight, so it fits int64.
+    """
+    total = np.zeros_like(weights)
+    fuel = weights
+
+    while True:
+        fuel = np.maximum(fuel // 3 - 2, 0)
+
+        if not fuel.any():
+            return total
 
+        total += fuel
 
-def get_fuel(weight, cache):
-    try:
-        return cache[weight]
 
-    except KeyError:
-        fuel = (weight // 3) - 2
+def get_sum(fuels, counts):
+    """
+    Sum fuels * counts in int64 when the sum is bounded to fit, otherwise in
+    Python ints.
+    """
+    if fuels.shape[0] == 0:
+        return 0
 
-        if fuel < 0:
-            return 0
+    if int(fuels.max()) <= MAX_INT64 // int(counts.sum()):
+        return int(fuels @ counts)
 
-        return fuel + get_fuel(fuel, cache)
+    return int(fuels.astype(object) @ counts.astype(object))
 
 
 def parse(lines):
-    return list(map(int, lines))
+    return map(int, lines)
 
 
 def read_file(filename):
     with open(filename, encoding="utf-8") as f_in:
-        return f_in.readlines()
+        yield from f_in
 
 
 def main(filename, expected=None):
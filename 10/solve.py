@@ -1,70 +1,13 @@
 #!/usr/bin/env python3
 
-from math import gcd
 import numpy as np
 
-
-class Coord:
-
-    y_range = None
-    x_range = None
-
-    def __init__(self, y, x):
-        self.y = int(y)
-        self.x = int(x)
-        self._hash = None
-
-    def __add__(self, other):
-        return Coord(self.y + other.y, self.x + other.x)
-
-    def __sub__(self, other):
-        return Coord(self.y - other.y, self.x - other.x)
-
-    def __mul__(self, other):
-        return Coord(self.y * other, self.x * other)
-
-    def __hash__(self):
-        if self._hash is None:
-            self._hash = (1000003 * self.x) ^ self.y
-        return self._hash
-
-    def __eq__(self, other):
-        if not isinstance(other, Coord):
-            return False
-        return self.y == other.y and self.x == other.x
-
-    def __repr__(self):
-        return f"{self.y}\t{self.x}"
-
-    def gcd_reduce(self):
-        """
-        Reduce the y/x coord by the greatest common divisor.  Ex:
-
-         2,  2 ->  1,  1
-        -3, -9 -> -1, -3
-        """
-        if self.y == 0 or self.x == 0:
-            divisor = max(abs(self.y), abs(self.x), 1)
-        else:
-            divisor = gcd(self.y, self.x)
-
-        return Coord(self.y // divisor, self.x // divisor)
-
-    @classmethod
-    def set_ranges(cls, asteroids):
-        y_max = max(asteroid.y for asteroid in asteroids)
-        x_max = max(asteroid.x for asteroid in asteroids)
-        cls.y_range = range(y_max + 1)
-        cls.x_range = range(x_max + 1)
-
-    def valid(self):
-        return self.y in self.y_range and self.x in self.x_range
+CHUNK_ELEMENTS = 2**20
+ASTEROID = ord("#")
 
 
 def solve(board):
-    asteroids = np.argwhere(board == "#")
-    asteroids = {Coord(*asteroid) for asteroid in asteroids}
-    Coord.set_ranges(asteroids)
+    asteroids = np.argwhere(board == ASTEROID)
     max_viewable, max_asteroid = get_central_asteroid(asteroids)
     return max_viewable
 
@@ -73,64 +16,72 @@ def get_central_asteroid(asteroids):
     """
     Find the asteroid with the best view of the other asteroids.
     """
-    max_viewable = 0
-    max_asteroid = None
-
-    for asteroid in asteroids:
-        n_viewable = find_viewable(asteroids, asteroid)
-
-        if n_viewable > max_viewable:
-            max_viewable = n_viewable
-            max_asteroid = asteroid
-
-    return max_viewable, max_asteroid
+    n_viewable = find_viewable(asteroids)
+    max_idx = n_viewable.argmax()
+    return int(n_viewable[max_idx]), tuple(int(x) for x in asteroids[max_idx])
 
 
-def find_viewable(asteroids, asteroid):
+def find_viewable(asteroids):
     """
-    Find the number of asteroids visible from the specified asteroid.
+    Find the number of asteroids visible from every asteroid.  An asteroid is
+    visible if it is the nearest along its reduced direction, so the number
+    visible is the number of distinct reduced directions.  After sorting each
+    station's direction keys, the number of changes in value is one less than
+    the number of distinct keys, which discounts the station itself.  The
+    stations are processed in chunks of about CHUNK_ELEMENTS keys, so the
+    memory per chunk is bounded however many asteroids there are.
     """
-    n_viewable = 0
+    n_viewable = np.empty(asteroids.shape[0], dtype=np.int64)
+    chunk_stations = max(1, CHUNK_ELEMENTS // asteroids.shape[0])
 
-    for asteroid_1 in asteroids:
-        if asteroid != asteroid_1 and not blocked(asteroids, asteroid, asteroid_1):
-            n_viewable += 1
+    for start in range(0, asteroids.shape[0], chunk_stations):
+        stations = asteroids[start : start + chunk_stations]
+        keys = get_direction_keys(stations, asteroids)
+        keys.sort(axis=1)
+        n_viewable[start : start + chunk_stations] = (np.diff(keys, axis=1) != 0).sum(
+            axis=1
+        )
 
     return n_viewable
 
 
-def blocked(asteroids, asteroid, asteroid_1):
+def get_direction_keys(stations, asteroids):
     """
-    Check if the path between two asteroids is blocked.  Travel from one
-    asteroid to the other.  If the next asteroid encountered is the other
-    asteroid, the path is not blocked.
+    Return an array of shape (n-stations, n-asteroids) with the direction from
+    each station to each asteroid packed into a single integer.  Directions are
+    reduced by the greatest common divisor.  Ex:
+
+     2,  2 ->  1,  1
+    -3, -9 -> -1, -3
     """
-    delta = (asteroid_1 - asteroid).gcd_reduce()
+    deltas = asteroids[None, :, :] - stations[:, None, :]
+    divisor = np.gcd(deltas[..., 0], deltas[..., 1])
+    divisor[divisor == 0] = 1
+    reduced = deltas // divisor[..., None]
+
+    extent = int(asteroids.max()) + 1
+    span = 2 * extent + 1
+    return (reduced[..., 0] + extent) * span + reduced[..., 1] + extent
 
-    if asteroid_1 == find_next_asteroid(asteroids, asteroid, delta):
-        return False
 
-    return True
+def parse(data):
+    return get_grid(data)
 
 
-def find_next_asteroid(asteroids, coord, delta):
+def get_grid(data):
     """
-    Find the next asteroid from coord with travelling along delta direction.
+    Reshape newline separated rows of ASCII bytes into a uint8 array of shape
+    (height, width).  The array is a view of the bytes with the newline column
+    sliced off.
     """
-    while coord.valid():
-        coord += delta
-
-        if coord in asteroids:
-            return coord
-
-
-def parse(lines):
-    return np.array(list(list(line.strip()) for line in lines))
+    data = data.rstrip(b"\n") + b"\n"
+    width = data.index(b"\n")
+    return np.frombuffer(data, dtype=np.uint8).reshape((-1, width + 1))[:, :width]
 
 
 def read_file(filename):
-    with open(filename, encoding="utf-8") as f_in:
-        return f_in.readlines()
+    with open(filename, "rb") as f_in:
+        return f_in.read()
 
 
 def main(filename, expected=None):
@@ -142,4 +93,5 @@ def main(filename, expected=None):
 
 if __name__ == "__main__":
     main("test_0.txt", 8)
+    main("test_1.txt", 210)
     main("input.txt")
@@ -1,174 +1,118 @@
 #!/usr/bin/env python3
 
-from math import gcd, pi, atan2
-from collections import deque
 import numpy as np
 
+CHUNK_ELEMENTS = 2**20
+ASTEROID = ord("#")
 
-class Coord:
 
-    y_range = None
-    x_range = None
-
-    def __init__(self, y, x):
-        self.y = int(y)
-        self.x = int(x)
-        self._hash = None
-
-    def __add__(self, other):
-        return Coord(self.y + other.y, self.x + other.x)
-
-    def __sub__(self, other):
-        return Coord(self.y - other.y, self.x - other.x)
-
-    def __mul__(self, other):
-        return Coord(self.y * other, self.x * other)
-
-    def __hash__(self):
-        if self._hash is None:
-            self._hash = (1000003 * self.x) ^ self.y
-        return self._hash
-
-    def __eq__(self, other):
-        if not isinstance(other, Coord):
-            return False
-        return self.y == other.y and self.x == other.x
-
-    def __repr__(self):
-        return f"{self.y}\t{self.x}"
-
-    def gcd_reduce(self):
-        """
-        Reduce the y/x coord by the greatest common divisor.  Ex:
-
-         2,  2 ->  1,  1
-        -3, -9 -> -1, -3
-        """
-        if self.y == 0 or self.x == 0:
-            divisor = max(abs(self.y), abs(self.x), 1)
-        else:
-            divisor = gcd(self.y, self.x)
-
-        return Coord(self.y // divisor, self.x // divisor)
-
-    @classmethod
-    def set_ranges(cls, asteroids):
-        y_max = max(asteroid.y for asteroid in asteroids)
-        x_max = max(asteroid.x for asteroid in asteroids)
-        cls.y_range = range(y_max + 1)
-        cls.x_range = range(x_max + 1)
-
-    def valid(self):
-        return self.y in self.y_range and self.x in self.x_range
-
-
-def solve(board):
-    asteroids = np.argwhere(board == "#")
-    asteroids = {Coord(*asteroid) for asteroid in asteroids}
-    Coord.set_ranges(asteroids)
+def solve(board, n_vaporized=200):
+    asteroids = np.argwhere(board == ASTEROID)
     max_viewable, max_asteroid = get_central_asteroid(asteroids)
-    asteroids.remove(max_asteroid)
-    target_asteroid = laser(asteroids, max_asteroid)
-    return target_asteroid.x * 100 + target_asteroid.y
-
-
-def laser(asteroids, central_asteroid):
-    angles = deque(get_angles(asteroids, central_asteroid))
-    laser_count = 0
+    vaporization_order = get_vaporization_order(asteroids, max_asteroid)
+    target_y, target_x = vaporization_order[n_vaporized - 1]
+    return int(target_x) * 100 + int(target_y)
 
-    previous_delta = None
-    while laser_count < 200:
 
-        asteroid, delta = angles.popleft()
-        if asteroid not in asteroids or delta == previous_delta:
-            continue
-
-        previous_delta = delta
-        next_asteroid = find_next_asteroid(asteroids, central_asteroid, delta)
-        asteroids.remove(next_asteroid)
-
-        if asteroid != next_asteroid:
-            angles.append((asteroid, delta))
-
-        laser_count += 1
-
-    return next_asteroid
-
-
-def get_angles(asteroids, central_asteroid):
-    angles = []
+def get_vaporization_order(asteroids, central_asteroid):
+    """
+    Return the asteroids in the order they are vaporized, shape (n - 1, 2).
+
+    Asteroids are grouped by their exact reduced direction from the central
+    asteroid.  Within a group, the gcd of the delta is the number of unit steps
+    along the direction, so it orders the group by distance.  The groups are
+    ordered clockwise from up by angle.  Each rotation of the laser vaporizes
+    the nearest remaining asteroid of every group, so the asteroid with rank r
+    in its group is vaporized in rotation r.  A stable sort by rank of the
+    angle ordered asteroids is the complete vaporization order.
+    """
+    others = asteroids[(asteroids != central_asteroid).any(axis=1)]
+    deltas = others - np.array(central_asteroid)
+    divisor = np.gcd(deltas[:, 0], deltas[:, 1])
+    reduced = deltas // divisor[:, None]
+    keys = get_direction_keys(np.array([central_asteroid]), others)[0]
+    angles = np.pi - np.arctan2(reduced[:, 1], reduced[:, 0])
 
-    for asteroid in asteroids:
-        delta = (asteroid - central_asteroid).gcd_reduce()
-        angle = pi - atan2(delta.x, delta.y)
-        angles.append((angle, asteroid, delta))
+    order = np.lexsort((divisor, keys, angles))
+    sorted_keys = keys[order]
+    group_starts = np.ones(order.shape[0], dtype=bool)
+    group_starts[1:] = sorted_keys[1:] != sorted_keys[:-1]
+    positions = np.arange(order.shape[0])
+    ranks = positions - np.maximum.accumulate(np.where(group_starts, positions, 0))
 
-    angles = sorted(angles, key=lambda x: x[0])
-    return deque([(asteroid, delta) for _, asteroid, delta in angles])
+    return others[order[np.argsort(ranks, kind="stable")]]
 
 
 def get_central_asteroid(asteroids):
     """
     Find the asteroid with the best view of the other asteroids.
     """
-    max_viewable = 0
-    max_asteroid = None
+    n_viewable = find_viewable(asteroids)
+    max_idx = n_viewable.argmax()
+    return int(n_viewable[max_idx]), tuple(int(x) for x in asteroids[max_idx])
 
-    for asteroid in asteroids:
-        n_viewable = find_viewable(asteroids, asteroid)
 
-        if n_viewable > max_viewable:
-            max_viewable = n_viewable
-            max_asteroid = asteroid
-
-    return max_viewable, max_asteroid
-
-
-def find_viewable(asteroids, asteroid):
+def find_viewable(asteroids):
     """
-    Find the number of asteroids visible from the specified asteroid.
+    Find the number of asteroids visible from every asteroid.  An asteroid is
+    visible if it is the nearest along its reduced direction, so the number
+    visible is the number of distinct reduced directions.  After sorting each
+    station's direction keys, the number of changes in value is one less than
+    the number of distinct keys, which discounts the station itself.  The
+    stations are processed in chunks of about CHUNK_ELEMENTS keys, so the
+    memory per chunk is bounded however many asteroids there are.
     """
-    n_viewable = 0
+    n_viewable = np.empty(asteroids.shape[0], dtype=np.int64)
+    chunk_stations = max(1, CHUNK_ELEMENTS // asteroids.shape[0])
 
-    for asteroid_1 in asteroids:
-        if asteroid != asteroid_1 and not blocked(asteroids, asteroid, asteroid_1):
-            n_viewable += 1
+    for start in range(0, asteroids.shape[0], chunk_stations):
+        stations = asteroids[start : start + chunk_stations]
+        keys = get_direction_keys(stations, asteroids)
+        keys.sort(axis=1)
+        n_viewable[start : start + chunk_stations] = (np.diff(keys, axis=1) != 0).sum(
+            axis=1
+        )
 
     return n_viewable
 
 
-def blocked(asteroids, asteroid, asteroid_1):
+def get_direction_keys(stations, asteroids):
     """
-    Check if the path between two asteroids is blocked.  Travel from one
-    asteroid to the other.  If the next asteroid encountered is the other
-    asteroid, the path is not blocked.
+    Return an array of shape (n-stations, n-asteroids) with the direction from
+    each station to each asteroid packed into a single integer.  Directions are
+    reduced by the greatest common divisor.  Ex:
+
+     2,  2 ->  1,  1
+    -3, -9 -> -1, -3
     """
-    delta = (asteroid_1 - asteroid).gcd_reduce()
+    deltas = asteroids[None, :, :] - stations[:, None, :]
+    divisor = np.gcd(deltas[..., 0], deltas[..., 1])
+    divisor[divisor == 0] = 1
+    reduced = deltas // divisor[..., None]
 
-    if asteroid_1 == find_next_asteroid(asteroids, asteroid, delta):
-        return False
+    extent = int(max(asteroids.max(), stations.max())) + 1
+    span = 2 * extent + 1
+    return (reduced[..., 0] + extent) * span + reduced[..., 1] + extent
 
-    return True
 
+def parse(data):
+    return get_grid(data)
 
-def find_next_asteroid(asteroids, coord, delta):
+
+def get_grid(data):
     """
-    Find the next asteroid from coord with travelling along delta direction.
+    Reshape newline separated rows of ASCII bytes into a uint8 array of shape
+    (height, width).  The array is a view of the bytes with the newline column
+    sliced off.
     """
-    while coord.valid():
-        coord += delta
-
-        if coord in asteroids:
-            return coord
-
-
-def parse(lines):
-    return np.array(list(list(line.strip()) for line in lines))
+    data = data.rstrip(b"\n") + b"\n"
+    width = data.index(b"\n")
+    return np.frombuffer(data, dtype=np.uint8).reshape((-1, width + 1))[:, :width]
 
 
 def read_file(filename):
-    with open(filename, encoding="utf-8") as f_in:
-        return f_in.readlines()
+    with open(filename, "rb") as f_in:
+        return f_in.read()
 
 
 def main(filename, expected=None):
@@ -5,31 +5,53 @@ import numpy as np
 
 
 def solve(positions, steps):
+    """
+    Positions may have a leading batch dimension, shape (..., n-bodies, 3), to
+    advance many independent systems together.  The energy is returned per
+    system.
+    """
     velocities = np.zeros_like(positions)
+    buffers = get_buffers(positions)
 
     for _ in range(steps):
-        step(positions, velocities)
+        step(positions, velocities, *buffers)
 
     return get_energy(positions, velocities)
 
 
-def step(positions, velocities):
-    velocities += get_delta_velocities(positions)
-    positions += velocities
+def get_buffers(positions):
+    """
+    Allocate the pairwise difference and gravity buffers reused every step.
+    """
+    *batch, n_bodies, n_axes = positions.shape
+    differences = np.empty((*batch, n_bodies, n_bodies, n_axes), dtype=positions.dtype)
+    gravity = np.empty_like(positions)
+    return differences, gravity
+
 
+def step(positions, velocities, differences, gravity):
+    get_delta_velocities(positions, differences, gravity)
+    velocities += gravity
+    positions += velocities
 
-def get_delta_velocities(positions):
-    delta_velocities = []
 
-    for position in positions:
-        delta = (positions > position).sum(axis=0) - (positions < position).sum(axis=0)
-        delta_velocities.append(delta)
+def get_delta_velocities(positions, differences, gravity):
+    """
+    differences[..., i, j, :] = positions[..., j, :] - positions[..., i, :]
 
-    return np.array(delta_velocities)
+    The sign of each difference is the pull of body j on body i, and the sum
+    over j is the change in velocity of body i.  Results are written in place.
+    """
+    np.subtract(positions[..., None, :, :], positions[..., :, None, :], out=differences)
+    np.sign(differences, out=differences)
+    differences.sum(axis=-2, out=gravity)
+    return gravity
 
 
 def get_energy(positions, velocities):
-    return abs(positions).sum(axis=1) @ abs(velocities).sum(axis=1)
+    potential = abs(positions).sum(axis=-1)
+    kinetic = abs(velocities).sum(axis=-1)
+    return (potential * kinetic).sum(axis=-1)
 
 
 def parse(lines):
@@ -2,6 +2,8 @@
 
 from re import fullmatch
 from math import lcm
+from concurrent.futures import ProcessPoolExecutor
+from os import cpu_count
 import numpy as np
 
 
@@ -9,45 +11,72 @@ def solve(positions, steps):
     """
     The position and velocities of each dimension are independent of the other
     dimensions.  The overall cycle will be a multiple of the per-dimension
-    cycles.  The cycles are found by treating the per-dimension positions and
-    velocities as a state and adding to a set.  The loop is terminated when all
-    dimension sets no longer grows.  The least common multiple will of the
-    per-dimension set lengths will be the first time every dimension state is
-    exactly the same as the initial.
+    cycles.  The simulation is reversible, so the first repeated state of a
+    dimension is always its initial state.  Each dimension is simulated on its
+    own until it returns to the initial state, in separate processes when more
+    than one core is available.  The least common multiple of the
+    per-dimension cycle lengths will be the first time every dimension state
+    is exactly the same as the initial.
     """
+    axes = [positions[:, axis].copy() for axis in range(positions.shape[1])]
+
+    workers = min(len(axes), cpu_count() or 1)
+
+    if workers > 1:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            cycle_lengths = list(executor.map(find_cycle_length, axes))
+
+    else:
+        cycle_lengths = list(map(find_cycle_length, axes))
+
+    return lcm(*cycle_lengths)
+
+
+def find_cycle_length(positions):
+    """
+    Simulate a single dimension until the positions and velocities match the
+    initial state.  Only the initial state is kept, so memory use is constant.
+    """
+    initial_positions = positions.copy()
     velocities = np.zeros_like(positions)
-    x_cache = set()
-    y_cache = set()
-    z_cache = set()
-    x_vector = tuple(positions[:, 0]) + tuple(velocities[:, 0])
-    y_vector = tuple(positions[:, 1]) + tuple(velocities[:, 1])
-    z_vector = tuple(positions[:, 2]) + tuple(velocities[:, 2])
-
-    while x_vector not in x_cache or y_vector not in y_cache or z_vector not in z_cache:
-        step(positions, velocities)
-        x_cache.add(x_vector)
-        y_cache.add(y_vector)
-        z_cache.add(z_vector)
-        x_vector = tuple(positions[:, 0]) + tuple(velocities[:, 0])
-        y_vector = tuple(positions[:, 1]) + tuple(velocities[:, 1])
-        z_vector = tuple(positions[:, 2]) + tuple(velocities[:, 2])
-
-    return lcm(len(x_cache), len(y_cache), len(z_cache))
-
-
-def step(positions, velocities):
-    velocities += get_delta_velocities(positions)
-    positions += velocities
+    buffers = get_buffers(positions)
+    cycle_length = 0
 
+    while True:
+        step(positions, velocities, *buffers)
+        cycle_length += 1
 
-def get_delta_velocities(positions):
-    delta_velocities = []
+        if not velocities.any() and np.array_equal(positions, initial_positions):
+            return cycle_length
 
-    for position in positions:
-        delta = (positions > position).sum(axis=0) - (positions < position).sum(axis=0)
-        delta_velocities.append(delta)
 
-    return np.array(delta_velocities)
+def get_buffers(positions):
+    """
+    Allocate the pairwise difference and gravity buffers reused every step.
+    """
+    *batch, n_bodies = positions.shape
+    differences = np.empty((*batch, n_bodies, n_bodies), dtype=positions.dtype)
+    gravity = np.empty_like(positions)
+    return differences, gravity
+
+
+def step(positions, velocities, differences, gravity):
+    get_delta_velocities(positions, differences, gravity)
+    velocities += gravity
+    positions += velocities
+
+
+def get_delta_velocities(positions, differences, gravity):
+    """
+    differences[..., i, j] = positions[..., j] - positions[..., i]
+
+    The sign of each difference is the pull of body j on body i, and the sum
+    over j is the change in velocity of body i.  Results are written in place.
+    """
+    np.subtract(positions[..., None, :], positions[..., :, None], out=differences)
+    np.sign(differences, out=differences)
+    differences.sum(axis=-1, out=gravity)
+    return gravity
 
 
 def get_energy(positions, velocities):
@@ -1,101 +1,168 @@
 #!/usr/bin/env python3
 
 from re import fullmatch
-from math import ceil
-import networkx as nx
-import numpy as np
+from bisect import bisect_left
 
 ORE = 1000000000000
 
 
-def solve(reactions):
+class Nanofactory:
     """
-    Perform a binary search using the ore required as the condition to adjust
-    the bounds.  Continue until the lower bound is at least one larger than
-    the upper bound.  Using this method the maximum ore lower than the 1
-    trillion constraint will be tested, but it might not be the most recent.
-    All values are saved and some post processing is performed to find the
-    largest less than one trillion.
+    This class compiles the reactions into integer indexed tables.  Chemicals
+    are interned to ints in topological order, from FUEL down to ORE, so a
+    chemical is only processed after every reaction consuming it.  The inputs
+    of each reaction are stored in flat lists with per-chemical offsets.
     """
-    lower, upper = find_bounds(reactions)
-    fuels = []
-    ores = []
-
-    while (upper - lower) >= 0:
-        mid = (lower + upper) // 2
-        ore = find_ore_required(reactions, mid)
-        fuels.append(mid)
-        ores.append(ore)
-
-        if ore < ORE:
-            lower = mid + 1
-
-        else:
-            upper = mid - 1
-
-    ores = np.array(ores)
-    fuels = np.array(fuels)
-    return fuels[ores < ORE].max()
-
-
-def find_bounds(reactions):
-    power = 0
 
-    while find_ore_required(reactions, 2**power) < ORE:
-        power += 1
+    def __init__(self, reactions):
+        producers = {
+            dst_name: (dst_value, srcs) for srcs, (dst_value, dst_name) in reactions
+        }
+        self.order = self.get_order(producers)
+        self.ids = {name: idx for idx, name in enumerate(self.order)}
+        self.fuel = self.ids["FUEL"]
+        self.ore = self.ids["ORE"]
+        self.output_quantities = [1] * len(self.order)
+        self.offsets = [0]
+        self.inputs = []
+        self.input_quantities = []
+
+        for name in self.order:
+            if name in producers:
+                dst_value, srcs = producers[name]
+                self.output_quantities[self.ids[name]] = dst_value
+
+                for src_value, src_name in srcs:
+                    self.inputs.append(self.ids[src_name])
+                    self.input_quantities.append(src_value)
+
+            self.offsets.append(len(self.inputs))
+
+        self.required = [0] * len(self.order)
+        self.fuels = [0]
+        self.ores = [0]
+
+    @staticmethod
+    def get_order(producers):
+        """
+        Topologically sort the chemicals so every consumer precedes the
+        chemicals it consumes.
+        """
+        consumers = {"ORE": 0}
+
+        for _, srcs in producers.values():
+            for _, src_name in srcs:
+                consumers[src_name] = consumers.get(src_name, 0) + 1
+
+        pending = [name for name in producers if consumers.get(name, 0) == 0]
+        order = []
+
+        while len(pending) > 0:
+            name = pending.pop()
+            order.append(name)
+
+            for _, src_name in producers.get(name, (None, ()))[1]:
+                consumers[src_name] -= 1
+
+                if consumers[src_name] == 0:
+                    pending.append(src_name)
+
+        return order
+
+    def ore_required(self, fuel):
+        """
+        Accumulate the quantity required of each chemical in a single pass over
+        the topological order, reusing the requirements list.
+        """
+        required = self.required
+        required[:] = [0] * len(required)
+        required[self.fuel] = fuel
+
+        for chemical in range(self.ore):
+            if required[chemical] <= 0:
+                continue
+
+            multiplier = -(-required[chemical] // self.output_quantities[chemical])
+
+            for idx in range(self.offsets[chemical], self.offsets[chemical + 1]):
+                required[self.inputs[idx]] += multiplier * self.input_quantities[idx]
+
+        return required[self.ore]
+
+    def evaluate(self, fuel):
+        """
+        Find the ore required for a quantity of fuel and record the point.  The
+        ore required is monotone in the fuel, so the recorded fuels and ores
+        are both sorted.
+        """
+        ore = self.ore_required(fuel)
+        idx = bisect_left(self.fuels, fuel)
+
+        if idx == len(self.fuels) or self.fuels[idx] != fuel:
+            self.fuels.insert(idx, fuel)
+            self.ores.insert(idx, ore)
+
+        return ore
+
+    def max_fuel(self, budgets):
+        """
+        Find the largest fuel requiring less ore than each budget.  The search
+        for a budget starts from the tightest bounds among the points recorded
+        by previous searches.
+
+        Without an upper bound, the ore-per-fuel ratio of the lower bound
+        estimates the fuel for the budget.  The step to the estimate is doubled
+        so the next point is likely an upper bound.  With both bounds, the
+        next point is interpolated between them.  If an interpolation fails to
+        halve the bounds, the next point is bisected instead.  A budget of at
+        most 0 ore buys no fuel and is not searched.
+        """
+        max_fuels = []
 
-    return 2 ** (power - 1), 2**power
+        for budget in budgets:
+            idx = bisect_left(self.ores, budget)
 
+            if idx == 0:
+                max_fuels.append(0)
+                continue
 
-def find_ore_required(reactions, fuel):
-    nodes, edges = get_edges(reactions)
-    graph = nx.DiGraph(edges)
-    nx.set_node_attributes(graph, nodes, "quantity")
+            lower = self.fuels[idx - 1]
+            upper = self.fuels[idx] if idx < len(self.fuels) else None
+            width = None
 
-    graph = graph.reverse()
+            while upper is None or upper - lower > 1:
+                lower_ore = self.ores[bisect_left(self.fuels, lower)]
 
-    for node in nx.topological_sort(graph):
-        required_output_quantity = get_required_output_quantity(graph, node)
-        multiplier = ceil(required_output_quantity / graph.nodes[node]["quantity"])
+                if upper is None:
+                    estimate = max(1, lower * budget // max(1, lower_ore))
+                    fuel = lower + 2 * (estimate - lower) + 1
 
-        if node == "FUEL":
-            multiplier = fuel
+                elif width is not None and upper - lower > width // 2:
+                    fuel = (lower + upper) // 2
 
-        graph.nodes[node]["quantity"] *= multiplier
-        increase_production(graph, node, multiplier)
+                else:
+                    upper_ore = self.ores[bisect_left(self.fuels, upper)]
+                    fuel = lower + (budget - lower_ore) * (upper - lower) // (
+                        upper_ore - lower_ore
+                    )
+                    fuel = min(max(fuel, lower + 1), upper - 1)
 
-    return graph.nodes["ORE"]["quantity"]
+                if upper is not None:
+                    width = upper - lower
 
+                if self.evaluate(fuel) < budget:
+                    lower = fuel
 
-def increase_production(graph, node, multiplier):
-    for *_, data in graph.out_edges(node, data=True):
-        data["quantity_required"] *= multiplier
+                else:
+                    upper = fuel
 
+            max_fuels.append(lower)
 
-def get_required_output_quantity(graph, node):
-    required_output_quantity = 0
+        return max_fuels
 
-    for *_, data in graph.in_edges(node, data=True):
-        required_output_quantity += data["quantity_required"]
 
-    required_output_quantity = max(1, required_output_quantity)
-
-    return required_output_quantity
-
-
-def get_edges(reactions):
-    edges = []
-    nodes = {"ORE": 1}
-
-    for srcs, dst in reactions:
-        dst_value, dst_name = dst
-        nodes[dst_name] = dst_value
-
-        for src in srcs:
-            src_value, src_name = src
-            edges.append((src_name, dst_name, {"quantity_required": src_value}))
-
-    return nodes, edges
+def solve(reactions):
+    return Nanofactory(reactions).max_fuel([ORE])[0]
 
 
 def parse(lines):
@@ -134,6 +201,8 @@ def main(filename, expected=None):
 
 
 if __name__ == "__main__":
+    factory = Nanofactory(parse(read_file("test_1.txt")))
+    assert factory.max_fuel([ORE, 0, 13312, 13313]) == [82892753, 0, 0, 1]
     main("test_1.txt", 82892753)
     main("test_2.txt", 5586022)
     main("test_3.txt", 460664)
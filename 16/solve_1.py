@@ -4,26 +4,60 @@ import numpy as np
 
 
 def solve(signal, pattern=[0, 1, 0, -1], phases=100):
-    pattern = pattern_generator(pattern, len(signal))
     signal = np.array(signal)
 
     for _ in range(phases):
-        signal = abs(pattern @ signal) % 10
+        signal = perform_phase(signal, pattern)
 
     return "".join(map(str, signal[:8]))
 
 
-def pattern_generator(pattern, length):
-    pattern_matrix = []
-
-    for row in range(1, 1 + length):
-        row_pattern = np.repeat(pattern, row)
-        tile_count = int(np.ceil((length + 1) / row_pattern.shape[0]))
-        row_pattern = np.tile(row_pattern, tile_count)
-        row_pattern = row_pattern[1 : 1 + length]
-        pattern_matrix.append(row_pattern)
-
-    return np.array(pattern_matrix)
+def perform_phase(signal, pattern):
+    """
+    Compute every output digit from the prefix sums of the signal instead of a
+    dense pattern matrix.  Rows are processed in groups [k, 2k), each group
+    covers about n * ln(2) pattern blocks, which bounds the memory used.
+    """
+    prefix = np.zeros(signal.shape[0] + 1, dtype=np.int64)
+    np.cumsum(signal, out=prefix[1:])
+    next_signal = np.empty(signal.shape[0], dtype=np.int64)
+    row = 1
+
+    while row <= signal.shape[0]:
+        rows = np.arange(row, min(2 * row, signal.shape[0] + 1))
+        next_signal[row - 1 : row - 1 + rows.shape[0]] = get_row_sums(
+            prefix, rows, pattern
+        )
+        row *= 2
+
+    return abs(next_signal) % 10
+
+
+def get_row_sums(prefix, rows, pattern):
+    """
+    Row k (1-indexed) of the pattern matrix is the pattern with every element
+    repeated k times, shifted left by one.  Block b of row k covers the signal
+    indices [k * b - 1, k * (b + 1) - 1) and has the value
+    pattern[b % len(pattern)].  The sum of the signal over a block is a
+    difference of two prefix sums.  Blocks with a value of 0 are skipped.
+    """
+    length = prefix.shape[0] - 1
+    counts = length // rows + 1
+    offsets = np.cumsum(counts) - counts
+    widths = np.repeat(rows, counts)
+    blocks = np.arange(counts.sum()) - np.repeat(offsets, counts)
+    values = np.asarray(pattern)[blocks % len(pattern)]
+
+    nonzero = values != 0
+    row_ids = np.repeat(np.arange(rows.shape[0]), counts)[nonzero]
+    widths = widths[nonzero]
+    blocks = blocks[nonzero]
+    starts = np.clip(widths * blocks - 1, 0, length)
+    ends = np.minimum(widths * (blocks + 1) - 1, length)
+    sums = np.zeros(row_ids.shape[0] + 1, dtype=np.int64)
+    np.cumsum(values[nonzero] * (prefix[ends] - prefix[starts]), out=sums[1:])
+    bounds = np.searchsorted(row_ids, np.arange(rows.shape[0] + 1))
+    return sums[bounds[1:]] - sums[bounds[:-1]]
 
 
 def parse(line):
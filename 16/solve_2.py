@@ -1,10 +1,90 @@
 #!/usr/bin/env python3
 
+from math import comb
 import numpy as np
 
 
 def solve(start_idx, signal, phases=100):
     """
+    After the midpoint, each phase replaces every element with the sum of the
+    elements from itself to the end of the signal (mod 10).  Applying this P
+    times weights the element k positions after idx with the number of ways to
+    take P - 1 + k steps choosing k of them:
+
+        signal_P[idx] = sum(C(P - 1 + k, k) * signal[idx + k]) mod 10
+
+    The coefficients are found mod 2 and mod 5 with Lucas' theorem and then
+    combined mod 10 with the Chinese remainder theorem.  The 8 digits of the
+    message are a single matrix product of the coefficients with 8 windows of
+    the signal tail, independent of the number of phases.
+    """
+    tail = get_signal_tail(start_idx, signal)
+
+    if phases < 1:
+        return "".join(map(str, tail[:8]))
+
+    coefficients = get_binomial_coefficients(phases, tail.shape[0])
+    tail = np.concatenate((tail, np.zeros(7, dtype=np.int64)))
+    windows = np.lib.stride_tricks.sliding_window_view(tail, coefficients.shape[0])
+    message = (windows[:8] @ coefficients) % 10
+    return "".join(map(str, message))
+
+
+def get_binomial_coefficients(phases, length):
+    """
+    Return C(phases - 1 + k, k) mod 10 for k in [0, length).  The modulus is
+    not prime, so the coefficients are found mod 2 and mod 5 and combined:
+
+        x = 5 * x_2 + 6 * x_5 mod 10
+
+    By Lucas' theorem, C(n, k) is odd exactly when the bits of k are a subset
+    of the bits of n.
+    """
+    dtype = np.int32 if length + phases < 2**31 else np.int64
+    k = np.arange(length, dtype=dtype)
+    n = k + (phases - 1)
+    coefficients = lucas(n, k, 5)
+    coefficients *= 6
+    coefficients[(n & k) == k] += 5
+    coefficients %= 10
+    return coefficients
+
+
+def lucas(n, k, prime):
+    """
+    Lucas' theorem:  C(n, k) mod p is the product of C(n_i, k_i) mod p over the
+    base p digits n_i, k_i of n and k.  A digit k_i > n_i makes the product 0.
+    Once the remaining digits of k are all 0 the factors are all 1, so the
+    loop stops.  The digit pairs are looked up in a flat table of size p * p,
+    and the digit buffers are reused between rounds.
+    """
+    table = np.zeros(prime * prime, dtype=n.dtype)
+
+    for n_i in range(prime):
+        for k_i in range(n_i + 1):
+            table[n_i * prime + k_i] = comb(n_i, k_i) % prime
+
+    result = np.ones_like(n)
+    n = n.copy()
+    k = k.copy()
+    n_digits = np.empty_like(n)
+    k_digits = np.empty_like(k)
+
+    while k.any():
+        np.divmod(n, prime, out=(n, n_digits))
+        np.divmod(k, prime, out=(k, k_digits))
+        n_digits *= prime
+        n_digits += k_digits
+        result *= table.take(n_digits)
+        result %= prime
+
+    return result
+
+
+def solve_phases(start_idx, signal, phases=100):
+    """
+    Phase by phase equivalent of solve.
+
     next signal = pattern_matrix @ signal
 
     pattern matrix:
@@ -35,38 +115,43 @@ def solve(start_idx, signal, phases=100):
     the phase once we process the target digits per point #1.
     """
     signal = get_reversed_signal_section(start_idx, signal)
+    next_signal = np.empty_like(signal)
 
     for _ in range(phases):
-        signal = perform_phase(signal)
+        perform_phase(signal, next_signal)
+        signal, next_signal = next_signal, signal
 
     return "".join(map(str, signal[-8:][::-1]))
 
 
-def perform_phase(signal):
+def perform_phase(signal, next_signal):
     """
-    Perform a single phase.
+    Perform a single phase into the next_signal buffer.  The running sum of
+    at most 9 * len(signal) fits in int32 before the mod.
     """
-    next_signal = []
-    value = 0
+    np.cumsum(signal, out=next_signal)
+    next_signal %= 10
+    return next_signal
 
-    for element in signal:
-        value += element
-        value %= 10
-        next_signal.append(value)
 
-    return next_signal
+def get_signal_tail(start_idx, signal):
+    """
+    Get the end portion of the signal after repeating, starting at start_idx.
+    """
+    signal = np.array(signal, dtype=np.int64)
+    signal_length = signal.shape[0] * 10_000
+    return signal[np.arange(start_idx, signal_length) % signal.shape[0]]
 
 
 def get_reversed_signal_section(start_idx, signal):
     """
-    Get the end portion of the signal after repeating
+    Get the end portion of the signal after repeating, reversed, as int32.
     """
     signal_length = len(signal) * 10_000
     end_index = signal_length - start_idx
-    signal = signal[::-1]
+    signal = np.array(signal[::-1], dtype=np.int32)
     whole_repeats = end_index // len(signal)
-    single_elements = end_index % len(signal)
-    return (signal * whole_repeats) + signal[:single_elements]
+    return np.tile(signal, whole_repeats + 1)[:end_index]
 
 
 def parse(line):
@@ -81,9 +166,11 @@ def read_file(filename):
 
 
 def main(filename):
-    assert solve(*parse("03036732577212944063491565474664")) == "84462026"
-    assert solve(*parse("02935109699940807407585447034323")) == "78725270"
-    assert solve(*parse("03081770884921959731165446850517")) == "53553731"
+    for solve_ in (solve, solve_phases):
+        assert solve_(*parse("03036732577212944063491565474664")) == "84462026"
+        assert solve_(*parse("02935109699940807407585447034323")) == "78725270"
+        assert solve_(*parse("03081770884921959731165446850517")) == "53553731"
+        assert solve_(*parse("03081770884921959731165446850517"), 0) == "73116544"
     print(solve(*parse(read_file(filename))))
 
 
@@ -4,6 +4,8 @@ from collections import deque, defaultdict
 from itertools import repeat, chain
 import numpy as np
 
+INTERSECTION = np.frombuffer(b".#.###.#.", dtype=np.uint8).reshape((3, 3))
+
 
 class AddressModes:
     POSITION_MODE = 0
@@ -240,29 +242,37 @@ def solve(program):
 
 
 def get_board(output_queue):
-    board = "".join(map(chr, output_queue)).split()
-    board = [list(row) for row in board]
-    return np.array(board)
+    """
+    The camera output is the board followed by a blank line, anything after it
+    (ex. the "Main:" prompt) is dropped.
+    """
+    data = bytes(output_queue)
+    end = data.find(b"\n\n")
+
+    if end >= 0:
+        data = data[:end]
+    return get_grid(data)
+
+
+def get_grid(data):
+    """
+    Reshape newline separated rows of ASCII bytes into a uint8 array of shape
+    (height, width).  The array is a view of the bytes with the newline column
+    sliced off.
+    """
+    data = data.rstrip(b"\n") + b"\n"
+    width = data.index(b"\n")
+    return np.frombuffer(data, dtype=np.uint8).reshape((-1, width + 1))[:, :width]
 
 
 def get_intersections(board):
-    intersections = set()
-    mask = np.array(
-        [
-            [".", "#", "."],
-            ["#", "#", "#"],
-            [".", "#", "."],
-        ]
-    )
-
-    for y in range(board.shape[0] - mask.shape[0]):
-        for x in range(board.shape[1] - mask.shape[1]):
-            board_slice = board[y : y + mask.shape[0], x : x + mask.shape[1]]
-
-            if (board_slice == mask).all():
-                intersections.add((y + 1, x + 1))
-
-    return intersections
+    """
+    Compare every 3x3 window of the board against the intersection mask at
+    once, the centers of the matching windows are the intersections.
+    """
+    windows = np.lib.stride_tricks.sliding_window_view(board, INTERSECTION.shape)
+    ys, xs = np.nonzero((windows == INTERSECTION).all(axis=(2, 3)))
+    return set(zip((ys + 1).tolist(), (xs + 1).tolist()))
 
 
 def parse(line):
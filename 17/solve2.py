@@ -5,6 +5,10 @@ from itertools import repeat, chain
 import numpy as np
 from pprint import pprint
 
+SCAFFOLD = ord("#")
+ROBOT = ord("^")
+INTERSECTION = np.frombuffer(b".#.###.#.", dtype=np.uint8).reshape((3, 3))
+
 
 class AddressModes:
     POSITION_MODE = 0
@@ -233,48 +237,6 @@ class Interpreter:
         return args
 
 
-class Coord:
-
-    def __init__(self, y, x):
-        self.y = int(y)
-        self.x = int(x)
-        self._hash = None
-
-    def __add__(self, other):
-        return Coord(self.y + other.y, self.x + other.x)
-
-    def __sub__(self, other):
-        return Coord(self.y - other.y, self.x - other.x)
-
-    def __mul__(self, other):
-        return Coord(self.y * other, self.x * other)
-
-    def __hash__(self):
-        if self._hash is None:
-            self._hash = (1000003 * self.x) ^ self.y
-        return self._hash
-
-    def __eq__(self, other):
-        if not isinstance(other, Coord):
-            return False
-        return self.y == other.y and self.x == other.x
-
-    def __repr__(self):
-        return f"{self.y}\t{self.x}"
-
-    @property
-    def c(self):
-        return (self.y, self.x)
-
-
-deltas = {
-    0: Coord(-1, 0),  # up
-    1: Coord(0, 1),  # right
-    2: Coord(1, 0),  # down
-    3: Coord(0, -1),  # left
-}
-
-
 def solve(program):
     """
     [('L', 10),   A
@@ -330,17 +292,20 @@ def solve(program):
      C: "R,10,L,10,L,12,R,6"
     """
     interpreter = Interpreter(program)
-    board = np.array(get_board(interpreter.run(deque())))
-    vacuum = Coord(*np.argwhere(board == "^")[0])
+    board = get_board(interpreter.run(deque()))
+    cells, width = flatten_board(board)
+    offsets = get_neighbor_offsets(width)
+    scaffold = (cells == SCAFFOLD).tolist()
+    vacuum = int(np.flatnonzero(cells == ROBOT)[0])
     orientation = 0
 
     orientations = [orientation]
     distances = []
 
-    while get_orientation(board, vacuum, orientation) is not None:
-        orientation = get_orientation(board, vacuum, orientation)
-        segment_length = get_segment_length(board, vacuum, orientation)
-        vacuum += deltas[orientation] * segment_length
+    while get_orientation(scaffold, offsets, vacuum, orientation) is not None:
+        orientation = get_orientation(scaffold, offsets, vacuum, orientation)
+        segment_length = get_segment_length(scaffold, offsets[orientation], vacuum)
+        vacuum += offsets[orientation] * segment_length
         orientations.append(orientation)
         distances.append(segment_length)
 
@@ -382,58 +347,75 @@ def get_turn(directions):
     }[(start, end)]
 
 
-def get_segment_length(board, vacuum, orientation):
+def get_segment_length(scaffold, offset, vacuum):
     segment_length = 0
 
-    while (
-        (vacuum + deltas[orientation]).c[0] in range(board.shape[0])
-        and (vacuum + deltas[orientation]).c[1] in range(board.shape[1])
-        and board[(vacuum + deltas[orientation]).c] == "#"
-    ):
+    while scaffold[vacuum + offset]:
         segment_length += 1
-        vacuum += deltas[orientation]
+        vacuum += offset
 
     return segment_length
 
 
-def get_orientation(board, vacuum, orientation):
-    for offset in (1, -1):
-        new_orientation = (orientation + offset) % 4
+def get_orientation(scaffold, offsets, vacuum, orientation):
+    for turn in (1, -1):
+        new_orientation = (orientation + turn) % 4
 
-        if (
-            (vacuum + deltas[new_orientation]).c[0] in range(board.shape[0])
-            and (vacuum + deltas[new_orientation]).c[1] in range(board.shape[1])
-            and board[(vacuum + deltas[new_orientation]).c] == "#"
-        ):
+        if scaffold[vacuum + offsets[new_orientation]]:
             return new_orientation
 
 
+def get_neighbor_offsets(width):
+    """
+    Up, right, down, left offsets in the flattened index space, indexed by
+    orientation.
+    """
+    return (-width, 1, width, -1)
+
+
+def flatten_board(board):
+    """
+    Surround the board with open space so every cell has four neighbors, and
+    flatten it.  Return the flat board and its width.
+    """
+    board = np.pad(board, 1, constant_values=ord("."))
+    return board.ravel(), board.shape[1]
+
+
 def get_board(output_queue):
-    board = "".join(map(chr, output_queue)).split()
-    print("\n".join(board))
-    board = [list(row) for row in board]
-    board = board[:-1]
-    return np.array(board)
+    """
+    The camera output is the board followed by a blank line, anything after it
+    (ex. the "Main:" prompt) is dropped.
+    """
+    data = bytes(output_queue)
+    end = data.find(b"\n\n")
+
+    if end >= 0:
+        data = data[:end]
+
+    print(data.decode())
+    return get_grid(data)
+
+
+def get_grid(data):
+    """
+    Reshape newline separated rows of ASCII bytes into a uint8 array of shape
+    (height, width).  The array is a view of the bytes with the newline column
+    sliced off.
+    """
+    data = data.rstrip(b"\n") + b"\n"
+    width = data.index(b"\n")
+    return np.frombuffer(data, dtype=np.uint8).reshape((-1, width + 1))[:, :width]
 
 
 def get_intersections(board):
-    intersections = set()
-    mask = np.array(
-        [
-            [".", "#", "."],
-            ["#", "#", "#"],
-            [".", "#", "."],
-        ]
-    )
-
-    for y in range(board.shape[0] - mask.shape[0]):
-        for x in range(board.shape[1] - mask.shape[1]):
-            board_slice = board[y : y + mask.shape[0], x : x + mask.shape[1]]
-
-            if (board_slice == mask).all():
-                intersections.add((y + 1, x + 1))
-
-    return intersections
+    """
+    Compare every 3x3 window of the board against the intersection mask at
+    once, the centers of the matching windows are the intersections.
+    """
+    windows = np.lib.stride_tricks.sliding_window_view(board, INTERSECTION.shape)
+    ys, xs = np.nonzero((windows == INTERSECTION).all(axis=(2, 3)))
+    return set(zip((ys + 1).tolist(), (xs + 1).tolist()))
 
 
 def parse(line):
@@ -1,227 +1,190 @@
 #!/usr/bin/env python3
 
-from string import ascii_lowercase
+from array import array
 from collections import deque
 import heapq
 from pprint import pprint
 import numpy as np
 
-
-class VectorTuple(tuple):
-    """
-    This class replicates vectorized operations of numpy arrays, with the
-    advantage that it's hashable.
-    """
-
-    def __new__(cls, *args):
-        if len(args) == 1 and not isinstance(args[0], tuple):
-            args = args[0]
-        return tuple.__new__(VectorTuple, args)
-
-    def __add__(self, other):
-        return VectorTuple(
-            self_element + other_element
-            for self_element, other_element in zip(self, other)
-        )
-
-    def __sub__(self, other):
-        return VectorTuple(
-            self_element - other_element
-            for self_element, other_element in zip(self, other)
-        )
-
-    def __mul__(self, other):
-        return VectorTuple(
-            self_element * other_element
-            for self_element, other_element in zip(self, other)
-        )
-
-    def __truediv__(self, other):
-        return VectorTuple(
-            self_element / other_element
-            for self_element, other_element in zip(self, other)
-        )
-
-    def __mod__(self, other):
-        return VectorTuple(
-            self_element % other_element
-            for self_element, other_element in zip(self, other)
-        )
-
-    def within_range(self, *ranges):
-        return all(element in range_ for element, range_ in zip(self, ranges))
-
-    def orthogonals(self, board):
-        """
-        Generate E, N, W, S adjacencies.
-        """
-        for delta in (
-            VectorTuple(0, 1),
-            VectorTuple(-1, 0),
-            VectorTuple(0, -1),
-            VectorTuple(1, 0),
-        ):
-            next_pos = self + delta
-            if next_pos.within_range(range(board.shape[0]), range(board.shape[1])):
-                yield next_pos
-
-    def diagonals(self, board):
-        """
-        Generate NE, NW, SW, SE adjacencies.
-        """
-        for delta in (
-            VectorTuple(-1, 1),
-            VectorTuple(-1, -1),
-            VectorTuple(1, -1),
-            VectorTuple(1, 1),
-        ):
-            next_pos = self + delta
-            if next_pos.within_range(range(board.shape[0]), range(board.shape[1])):
-                yield next_pos
+WALL = ord("#")
 
 
 def solve(board):
-    distance_matrix = get_shortest_path_matrix(board)
-    dependencies = get_dependencies(board)
+    """
+    Dijkstra's algorithm over (position, keyset) states.  The vault is a maze
+    without loops, so the shortest path between two keys is the only path.  A
+    key can be travelled to once the keyset has the keys for every door on the
+    path and every key passed through on the path.  Visited states are tracked in a
+    dense bitvector indexed by position << n_keys | keyset, the '@' bit is
+    dropped from the keyset for the index.
+    """
+    distance_matrix, requirements = get_shortest_path_matrix(board)
+    n_points = distance_matrix.shape[0]
+    n_keys = n_points - 1
+    total_keys = 2**n_points - 1
+    distance_matrix = distance_matrix.tolist()
+    requirements = requirements.tolist()
+    visited = bytearray((n_points << n_keys) // 8 + 1)
 
     queue = []
-    heapq.heappush(queue, (0, 0, 0))
-
-    total_keys = set(range(distance_matrix.shape[0]))
-    total_keys = sum(2**key for key in total_keys)
-
-    dependencies_ = [None] * distance_matrix.shape[0]
-    for key, deps in dependencies.items():
-        deps_ = total_keys
-        for dep in deps:
-            deps_ ^= 1 << dep
-        dependencies_[key] = deps_
+    heapq.heappush(queue, (0, 0, 1))
 
-    dependencies = dependencies_
+    while len(queue) > 0:
+        length, coord, keys = heapq.heappop(queue)
 
-    visited = set()
-    keys = 0
+        if keys == total_keys:
+            print(length)
+            return length
 
-    while keys != total_keys:
-        length, coord, keys = heapq.heappop(queue)
+        state = coord << n_keys | keys >> 1
 
-        visited.add((coord, keys))
+        if visited[state >> 3] & (1 << (state & 7)):
+            continue
 
-        keys |= 1 << coord
+        visited[state >> 3] |= 1 << (state & 7)
 
-        for adjacency in range(distance_matrix.shape[0]):
+        for adjacency in range(1, n_points):
+            next_keys = keys | (1 << adjacency)
 
-            if (1 << adjacency) & keys != 0:
+            if next_keys == keys or requirements[coord][adjacency] & ~keys:
                 continue
 
-            coord_id = (adjacency, keys)
+            next_state = adjacency << n_keys | next_keys >> 1
 
-            if coord_id in visited:
+            if visited[next_state >> 3] & (1 << (next_state & 7)):
                 continue
 
-            if dependencies[adjacency] | keys == total_keys:
-                heapq.heappush(
-                    queue, (length + distance_matrix[coord, adjacency], adjacency, keys)
-                )
+            heapq.heappush(
+                queue,
+                (length + distance_matrix[coord][adjacency], adjacency, next_keys),
+            )
 
-    print(length)
-    return length
+    raise ValueError("keys unreachable")
 
 
 def get_char_map(board):
     """
-    Map '@' symbol and characters a-z to 0-26
+    Map the bytes of '@' and a-z to 0-26
     """
-    chars = sorted(set(ascii_lowercase) & set(np.unique(board)))
-    chars.insert(0, "@")
+    chars = np.unique(board)
+    chars = [ord("@")] + chars[(chars >= ord("a")) & (chars <= ord("z"))].tolist()
     return {char: value for value, char in enumerate(chars)}
 
 
-def get_dependencies(board):
+def get_shortest_path_matrix(board):
     """
-    Build a map of key to dependencies by tracking doors encountered along the
-    path to every key.
+    Generate all pair shortest path matrix and the matching requirements matrix.
+    requirements[src, dst] is a bitvector, using the char map values, of the
+    keys for the doors on the path and of the keys passed through on the path.
     """
     char_map = get_char_map(board)
-    coord = VectorTuple(*np.argwhere(board == "@")[0])
-    queue = deque([(coord, set())])
-    visited = set()
-    dependencies = {}
+    cells, width = flatten_board(board)
+    walls = (cells == WALL).tolist()
+    bits = get_cell_bits(cells, char_map).tolist()
+    positions = {char: int(np.flatnonzero(cells == char)[0]) for char in char_map}
 
-    while len(queue) > 0:
-        coord, doors = queue.popleft()
-        visited.add(coord)
+    matrix_size = (len(char_map),) * 2
+    matrix = np.zeros(matrix_size, dtype=np.uint16)  # matrix[src, dst]
+    requirements = np.zeros(matrix_size, dtype=np.int64)
+    unvisited = array("i", [-1]) * cells.shape[0]
+    distances = array("i", unvisited)
+    masks = array("q", bytes(8 * cells.shape[0]))
 
-        if board[coord].islower() and board[coord] not in dependencies:
-            dependencies[char_map[board[coord]]] = doors
+    for src, src_value in char_map.items():
+        distances[:] = unvisited
+        bfs(walls, bits, width, [positions[src]], distances, masks)
 
-        for adjacency in coord.orthogonals(board):
+        for dst, dst_value in char_map.items():
+            if distances[positions[dst]] >= 0:
+                matrix[src_value, dst_value] = distances[positions[dst]]
+                requirements[src_value, dst_value] = masks[positions[dst]]
 
-            if adjacency in visited:
-                continue
+    return matrix, requirements
 
-            if board[adjacency] != "#":
-                if board[adjacency].isupper():
-                    doors = doors | {char_map[board[adjacency].lower()]}
 
-                queue.append((adjacency, doors))
+def bfs(walls, bits, width, sources, distances, masks):
+    """
+    Multi-source breadth first search over flattened cell indices.  The
+    distances and masks arrays are reused between searches, distances must be
+    -1 for every cell on entry and unreachable cells are left at -1.
+    masks[cell] accumulates the bits of every cell passed through on the way
+    to cell, excluding the source and cell.  Masks are only read for reached
+    cells, which are all written first, so only the sources are reset.
+    """
+    offsets = get_neighbor_offsets(width)
 
-    return dependencies
+    for source in sources:
+        distances[source] = 0
+        masks[source] = 0
 
+    queue = deque(sources)
 
-def get_shortest_path_matrix(board):
-    """
-    Generate all pair shortest path matrix.
-    """
-    char_map = get_char_map(board)
-    matrix_size = (len(char_map),) * 2
-    matrix = np.zeros(matrix_size, dtype=np.uint16)  # matrix[src, dst]
+    while len(queue) > 0:
+        cell = queue.popleft()
+        distance = distances[cell] + 1
+        mask = masks[cell] | (bits[cell] if distance > 1 else 0)
 
-    for src, src_value in char_map.items():
-        shortest_paths = get_single_source_all_dest_shortest_paths(board, src)
+        for offset in offsets:
+            adjacency = cell + offset
 
-        for dst, length in shortest_paths.items():
-            matrix[src_value, char_map[dst]] = length
+            if walls[adjacency] or distances[adjacency] >= 0:
+                continue
+
+            distances[adjacency] = distance
+            masks[adjacency] = mask
+            queue.append(adjacency)
 
-    return matrix
+    return distances, masks
 
 
-def get_single_source_all_dest_shortest_paths(board, source):
+def get_neighbor_offsets(width):
     """
-    Build single source all destination distance map.
+    E, N, W, S offsets in the flattened index space.
     """
-    coord = VectorTuple(*np.argwhere(board == source)[0])
-    length = 0
-    queue = deque([(coord, length)])
-    visited = set()
-    lengths = {}
+    return (1, -width, -1, width)
 
-    while len(queue) > 0:
-        coord, length = queue.popleft()
-        visited.add(coord)
 
-        if board[coord] in ascii_lowercase + "@" and board[coord] not in lengths:
-            lengths[board[coord]] = length
+def flatten_board(board):
+    """
+    Surround the board with walls so every open cell has four neighbors, and
+    flatten it.  Return the flat board and its width.
+    """
+    board = np.pad(board, 1, constant_values=WALL)
+    return board.ravel(), board.shape[1]
+
 
-        for adjacency in coord.orthogonals(board):
+def get_cell_bits(cells, char_map):
+    """
+    Map every key and door cell to the bit of its key, by indexing a table of
+    the bits of all 256 bytes with the cells.
+    """
+    table = np.zeros(256, dtype=np.int64)
 
-            if adjacency in visited:
-                continue
+    for char, value in char_map.items():
+        if ord("a") <= char <= ord("z"):
+            table[char] = table[ord(chr(char).upper())] = 1 << value
 
-            if board[adjacency] != "#":
-                queue.append((adjacency, length + 1))
+    return table[cells]
 
-    return lengths
 
+def parse(data):
+    return get_grid(data)
 
-def parse(lines):
-    lines = [list(line.strip()) for line in lines]
-    return np.array(lines)
+
+def get_grid(data):
+    """
+    Reshape newline separated rows of ASCII bytes into a uint8 array of shape
+    (height, width).  The array is a view of the bytes with the newline column
+    sliced off.
+    """
+    data = data.rstrip(b"\n") + b"\n"
+    width = data.index(b"\n")
+    return np.frombuffer(data, dtype=np.uint8).reshape((-1, width + 1))[:, :width]
 
 
 def read_file(filename):
-    with open(filename, encoding="utf-8") as f_in:
-        return f_in.readlines()
+    with open(filename, "rb") as f_in:
+        return f_in.read()
 
 
 def main(filename):
@@ -233,10 +196,6 @@ def main(filename):
     solving
     3646
     3646
-
-    real	23m10.583s
-    user	22m56.562s
-    sys	0m14.266s
     """
     assert solve(parse(read_file("test_0.txt"))) == 86
     assert solve(parse(read_file("test_1.txt"))) == 132
@@ -1,183 +1,160 @@
 #!/usr/bin/env python3
 
-from string import ascii_lowercase
+from array import array
 from collections import deque
 import heapq
 from pprint import pprint
 import numpy as np
 
 INF = 2**16 - 1
+ROBOTS = 4
+POSITION_BITS = 5
+WALL = ord("#")
 
 
-class VectorTuple(tuple):
-    """
-    This class replicates vectorized operations of numpy arrays, with the
-    advantage that it's hashable.
+def solve(board):
     """
+    A* search over the positions of the four robots and the keyset.  Each key
+    is only reachable by the robot in its quadrant, so only that robot is
+    considered for the key.  States are packed into a single integer:
 
-    def __new__(cls, *args):
-        if len(args) == 1 and not isinstance(args[0], tuple):
-            args = args[0]
-        return tuple.__new__(VectorTuple, args)
+        keyset << (4 * 5) | position_3 << 15 | ... | position_0
 
-    def __add__(self, other):
-        return VectorTuple(
-            self_element + other_element
-            for self_element, other_element in zip(self, other)
+    The heuristic is the sum over the robots of the minimum spanning tree of
+    the robot position and its remaining keys.  Collecting the keys of a
+    quadrant traverses a spanning tree of them, so the heuristic never
+    overestimates.
+    """
+    distance_matrix, requirements = get_shortest_path_matrix(board)
+    total_keys = 2 ** distance_matrix.shape[0] - 1
+    quadrant_keys = get_quadrant_keys(distance_matrix)
+    distance_matrix = distance_matrix.tolist()
+    requirements = requirements.tolist()
+    spanning_trees = {}
+
+    def heuristic(robot_positions, keys):
+        return sum(
+            get_spanning_tree_length(
+                distance_matrix,
+                position,
+                quadrant_keys[idx] & ~keys,
+                spanning_trees,
+            )
+            for idx, position in enumerate(robot_positions)
         )
 
-    def __sub__(self, other):
-        return VectorTuple(
-            self_element - other_element
-            for self_element, other_element in zip(self, other)
-        )
+    robot_positions = list(range(ROBOTS))
+    keys = 2**ROBOTS - 1
+    queue = [(heuristic(robot_positions, keys), 0, pack_state(robot_positions, keys))]
+    lengths = {queue[0][2]: 0}
+    visited = set()
 
-    def __mul__(self, other):
-        return VectorTuple(
-            self_element * other_element
-            for self_element, other_element in zip(self, other)
-        )
+    while len(queue) > 0:
+        _, length, state = heapq.heappop(queue)
 
-    def __truediv__(self, other):
-        return VectorTuple(
-            self_element / other_element
-            for self_element, other_element in zip(self, other)
-        )
+        if state in visited:
+            continue
 
-    def __mod__(self, other):
-        return VectorTuple(
-            self_element % other_element
-            for self_element, other_element in zip(self, other)
-        )
+        visited.add(state)
+        robot_positions, keys = unpack_state(state)
 
-    def within_range(self, *ranges):
-        return all(element in range_ for element, range_ in zip(self, ranges))
-
-    def orthogonals(self, board):
-        """
-        Generate E, N, W, S adjacencies.
-        """
-        for delta in (
-            VectorTuple(0, 1),
-            VectorTuple(-1, 0),
-            VectorTuple(0, -1),
-            VectorTuple(1, 0),
-        ):
-            next_pos = self + delta
-            if next_pos.within_range(range(board.shape[0]), range(board.shape[1])):
-                yield next_pos
-
-    def diagonals(self, board):
-        """
-        Generate NE, NW, SW, SE adjacencies.
-        """
-        for delta in (
-            VectorTuple(-1, 1),
-            VectorTuple(-1, -1),
-            VectorTuple(1, -1),
-            VectorTuple(1, 1),
-        ):
-            next_pos = self + delta
-            if next_pos.within_range(range(board.shape[0]), range(board.shape[1])):
-                yield next_pos
+        if keys == total_keys:
+            print(length)
+            return length
 
+        for idx, robot_position in enumerate(robot_positions):
+            remaining_keys = quadrant_keys[idx] & ~keys
 
-def solve(board):
-    distance_matrix = get_shortest_path_matrix(board)
-    total_keys = 2 ** distance_matrix.shape[0] - 1
-    dependencies = get_dependencies(board, total_keys)
+            while remaining_keys:
+                adjacency = remaining_keys.bit_length() - 1
+                remaining_keys ^= 1 << adjacency
 
-    queue = initialize_queue()
-    visited = set()
-    pending_visit = set()
-    keys = 0
+                # proceed if we have all of the keys required to travel to the adjacency
+                if requirements[robot_position][adjacency] & ~keys:
+                    continue
 
-    while keys != total_keys and len(queue) > 0:
-        length, *state = heapq.heappop(queue)
-        visited.add(tuple(state))
-        *robot_positions, keys = state
-        keys = update_keys(keys, robot_positions)
+                next_positions = robot_positions.copy()
+                next_positions[idx] = adjacency
+                next_keys = keys | (1 << adjacency)
+                next_state = pack_state(next_positions, next_keys)
+                next_length = length + distance_matrix[robot_position][adjacency]
+
+                if next_state not in lengths or next_length < lengths[next_state]:
+                    lengths[next_state] = next_length
+                    heapq.heappush(
+                        queue,
+                        (
+                            next_length + heuristic(next_positions, next_keys),
+                            next_length,
+                            next_state,
+                        ),
+                    )
 
-        # enumerate each of the robots
-        for idx, robot_position in enumerate(robot_positions):
+    raise ValueError("keys unreachable")
 
-            # enumerate adjacencies for a robot
-            for adjacency in range(distance_matrix.shape[0]):
 
-                # skip if we already have the key for the adjacency
-                if ((1 << adjacency) & keys) != 0:
-                    continue
+def pack_state(robot_positions, keys):
+    state = keys
 
-                # skip if there is no path to the adjacency
-                if distance_matrix[robot_position, adjacency] == INF:
-                    continue
+    for robot_position in reversed(robot_positions):
+        state = state << POSITION_BITS | robot_position
 
-                adjacency_ = robot_positions.copy()
-                adjacency_[idx] = adjacency
-                state = tuple(adjacency_) + (keys,)
+    return state
 
-                if state in visited:
-                    continue
 
-                # proceed if we have all of the keys required to travel to the adjacency
-                if dependencies[adjacency] | keys == total_keys:
-                    next_state = (
-                        length + distance_matrix[robot_position, adjacency],
-                        *state,
-                    )
-
-                    # proceed if the next state is not already pending
-                    if next_state not in pending_visit:
-                        pending_visit.add(next_state)
-                        heapq.heappush(queue, next_state)
+def unpack_state(state):
+    robot_positions = []
 
-    print(length)
-    return length
+    for _ in range(ROBOTS):
+        robot_positions.append(state & (2**POSITION_BITS - 1))
+        state >>= POSITION_BITS
 
+    return robot_positions, state
 
-def update_keys(keys, robot_positions):
-    # set key bits for each current robot position
-    for robot_position in robot_positions:
-        keys |= 1 << robot_position
 
-    return keys
+def get_quadrant_keys(distance_matrix):
+    """
+    Build a bitvector per robot of the keys reachable from its start position.
+    """
+    quadrant_keys = [0] * ROBOTS
 
+    for robot in range(ROBOTS):
+        for key in range(ROBOTS, distance_matrix.shape[0]):
+            if distance_matrix[robot, key] != INF:
+                quadrant_keys[robot] |= 1 << key
 
-def initialize_queue():
-    queue = []
-    length = 0
-    initial_coord = (0, 1, 2, 3)
-    keys = 0
-    heapq.heappush(queue, (length,) + initial_coord + (keys,))
-    return queue
+    return quadrant_keys
 
 
-def bit_vectorize_dependencies(dependencies, total_keys):
+def get_spanning_tree_length(distance_matrix, position, keys, spanning_trees):
     """
-    Create a list of bitvectors to encode the dependencies of each key.
-
-    ex:
-                                  key_0 ------|
-                                  key_2 ----v v
-        vectorized_dependencies[key_3]:  0b1010
-        this means `key_3` requires key_0 and key_2
+    Find the length of the minimum spanning tree of the position and the keys
+    in the bitvector with Prim's algorithm.  Results are memoized in
+    spanning_trees.
     """
-    vectorized_dependencies = [total_keys] * total_keys.bit_length()
+    try:
+        return spanning_trees[(position, keys)]
 
-    for key, key_dependencies in dependencies.items():
-        vectorized_key_dependencies = total_keys
+    except KeyError:
+        pending = [key for key in range(keys.bit_length()) if keys & (1 << key)]
+        lengths = [distance_matrix[position][key] for key in pending]
+        tree_length = 0
 
-        for dep in key_dependencies:
-            vectorized_key_dependencies ^= 1 << dep
+        while len(pending) > 0:
+            idx = lengths.index(min(lengths))
+            tree_length += lengths.pop(idx)
+            node = pending.pop(idx)
 
-        vectorized_dependencies[key] = vectorized_key_dependencies
+            for key_idx, key in enumerate(pending):
+                lengths[key_idx] = min(lengths[key_idx], distance_matrix[node][key])
 
-    return vectorized_dependencies
+        spanning_trees[(position, keys)] = tree_length
+        return tree_length
 
 
 def get_char_map(board):
     """
-    Map '0', '1', '2', '3' and characters a-z to 0-29
+    Map the bytes of '0', '1', '2', '3' and a-z to 0-29
     0:0
     1:1
     2:2
@@ -187,101 +164,125 @@ def get_char_map(board):
     ...
     z:29
     """
-    chars = sorted(set(ascii_lowercase) & set(np.unique(board)))
-    chars = ["0", "1", "2", "3"] + chars
+    chars = np.unique(board)
+    chars = list(b"0123") + chars[(chars >= ord("a")) & (chars <= ord("z"))].tolist()
     return {char: value for value, char in enumerate(chars)}
 
 
-def get_dependencies(board, total_keys):
+def get_shortest_path_matrix(board):
     """
-    Build a map of key to dependencies by tracking doors encountered along the
-    path to every key.
+    Generate all pair shortest path matrix and the matching requirements matrix.
+    requirements[src, dst] is a bitvector, using the char map values, of the
+    keys for the doors on the path and of the keys passed through on the path.
     """
     char_map = get_char_map(board)
-    visited = set()
-    dependencies = {}
+    cells, width = flatten_board(board)
+    walls = (cells == WALL).tolist()
+    bits = get_cell_bits(cells, char_map).tolist()
+    positions = {char: int(np.flatnonzero(cells == char)[0]) for char in char_map}
 
-    for char in ["0", "1", "2", "3"]:
-        coord = VectorTuple(*np.argwhere(board == char)[0])
-        queue = deque([(coord, set())])
+    matrix_size = (len(char_map),) * 2
+    matrix = np.full(matrix_size, INF, dtype=np.uint16)  # matrix[src, dst]
+    requirements = np.zeros(matrix_size, dtype=np.int64)
+    unvisited = array("i", [-1]) * cells.shape[0]
+    distances = array("i", unvisited)
+    masks = array("q", bytes(8 * cells.shape[0]))
 
-        while len(queue) > 0:
-            coord, doors = queue.popleft()
-            doors = doors.copy()
-            visited.add(coord)
+    for src, src_value in char_map.items():
+        distances[:] = unvisited
+        bfs(walls, bits, width, [positions[src]], distances, masks)
 
-            if board[coord].islower() and board[coord] not in dependencies:
-                dependencies[char_map[board[coord]]] = doors
+        for dst, dst_value in char_map.items():
+            if distances[positions[dst]] >= 0:
+                matrix[src_value, dst_value] = distances[positions[dst]]
+                requirements[src_value, dst_value] = masks[positions[dst]]
 
-            for adjacency in coord.orthogonals(board):
+    return matrix, requirements
 
-                if adjacency in visited:
-                    continue
 
-                if board[adjacency] != "#":
-                    doors_ = doors.copy()
+def bfs(walls, bits, width, sources, distances, masks):
+    """
+    Multi-source breadth first search over flattened cell indices.  The
+    distances and masks arrays are reused between searches, distances must be
+    -1 for every cell on entry and unreachable cells are left at -1.
+    masks[cell] accumulates the bits of every cell passed through on the way
+    to cell, excluding the source and cell.  Masks are only read for reached
+    cells, which are all written first, so only the sources are reset.
+    """
+    offsets = get_neighbor_offsets(width)
 
-                    if board[adjacency].isupper():
-                        doors_ = doors | {char_map[board[adjacency].lower()]}
+    for source in sources:
+        distances[source] = 0
+        masks[source] = 0
 
-                    queue.appendleft((adjacency, doors_))
+    queue = deque(sources)
 
-    return bit_vectorize_dependencies(dependencies, total_keys)
+    while len(queue) > 0:
+        cell = queue.popleft()
+        distance = distances[cell] + 1
+        mask = masks[cell] | (bits[cell] if distance > 1 else 0)
 
+        for offset in offsets:
+            adjacency = cell + offset
 
-def get_shortest_path_matrix(board):
-    """
-    Generate all pair shortest path matrix.
-    """
-    char_map = get_char_map(board)
-    matrix_size = (len(char_map),) * 2
-    matrix = np.full(matrix_size, INF, dtype=np.uint16)  # matrix[src, dst]
+            if walls[adjacency] or distances[adjacency] >= 0:
+                continue
 
-    for src, src_value in char_map.items():
-        shortest_paths = get_single_source_all_dest_shortest_paths(board, src)
+            distances[adjacency] = distance
+            masks[adjacency] = mask
+            queue.append(adjacency)
 
-        for dst, length in shortest_paths.items():
-            matrix[src_value, char_map[dst]] = length
+    return distances, masks
 
-    return matrix
+
+def get_neighbor_offsets(width):
+    """
+    E, N, W, S offsets in the flattened index space.
+    """
+    return (1, -width, -1, width)
 
 
-def get_single_source_all_dest_shortest_paths(board, source):
+def flatten_board(board):
     """
-    Build single source all destination distance map.
+    Surround the board with walls so every open cell has four neighbors, and
+    flatten it.  Return the flat board and its width.
     """
-    coord = VectorTuple(*np.argwhere(board == source)[0])
-    length = 0
-    queue = deque([(coord, length)])
-    visited = set()
-    lengths = {}
+    board = np.pad(board, 1, constant_values=WALL)
+    return board.ravel(), board.shape[1]
 
-    while len(queue) > 0:
-        coord, length = queue.popleft()
-        visited.add(coord)
 
-        if board[coord] in ascii_lowercase + "0123" and board[coord] not in lengths:
-            lengths[board[coord]] = length
+def get_cell_bits(cells, char_map):
+    """
+    Map every key and door cell to the bit of its key, by indexing a table of
+    the bits of all 256 bytes with the cells.
+    """
+    table = np.zeros(256, dtype=np.int64)
 
-        for adjacency in coord.orthogonals(board):
+    for char, value in char_map.items():
+        if ord("a") <= char <= ord("z"):
+            table[char] = table[ord(chr(char).upper())] = 1 << value
 
-            if adjacency in visited:
-                continue
+    return table[cells]
 
-            if board[adjacency] != "#":
-                queue.append((adjacency, length + 1))
 
-    return lengths
+def parse(data):
+    return get_grid(data)
 
 
-def parse(lines):
-    lines = [list(line.strip()) for line in lines]
-    return np.array(lines)
+def get_grid(data):
+    """
+    Reshape newline separated rows of ASCII bytes into a uint8 array of shape
+    (height, width).  The array is a view of the bytes with the newline column
+    sliced off.
+    """
+    data = data.rstrip(b"\n") + b"\n"
+    width = data.index(b"\n")
+    return np.frombuffer(data, dtype=np.uint8).reshape((-1, width + 1))[:, :width]
 
 
 def read_file(filename):
-    with open(filename, encoding="utf-8") as f_in:
-        return f_in.readlines()
+    with open(filename, "rb") as f_in:
+        return f_in.read()
 
 
 def main(filename):
@@ -1,31 +1,132 @@
 #!/usr/bin/env python3
 
-
-def solve(actions, deck_size=10007):
-    deck = list(range(deck_size))
-
-    for function, arg in actions:
-        deck = function(deck, arg)
-
-    return deck
-
-
-def stack(deck, _):
-    return deck[::-1]
+import numpy as np
 
 
-def cut(deck, position):
-    return deck[position:] + deck[:position]
-
+def solve(actions, deck_size=10007):
+    return get_deck(get_shuffle(actions, deck_size), deck_size).tolist()
 
-def increment(deck, interval):
-    result = [None] * len(deck)
 
-    for src_idx, card in enumerate(deck):
-        dst_idx = (src_idx * interval) % len(deck)
-        result[dst_idx] = card
+def get_shuffle(actions, deck_size):
+    """
+    Every technique moves the card at position x to position a * x + b
+    (mod deck_size), so the whole shuffle composes into a single (a, b) pair.
+    """
+    shuffle = (1, 0)
 
-    return result
+    for function, arg in actions:
+        shuffle = function(shuffle, deck_size, arg)
+
+    return shuffle
+
+
+def stack(shuffle, deck_size, _):
+    a, b = shuffle
+    return -a % deck_size, (-b - 1) % deck_size
+
+
+def cut(shuffle, deck_size, position):
+    a, b = shuffle
+    return a, (b - position) % deck_size
+
+
+def increment(shuffle, deck_size, interval):
+    a, b = shuffle
+    return (a * interval) % deck_size, (b * interval) % deck_size
+
+
+def get_position(shuffle, deck_size, card):
+    """
+    Find where a card ends up after the shuffle.
+    """
+    a, b = shuffle
+    return (a * card + b) % deck_size
+
+
+def get_card(shuffle, deck_size, position):
+    """
+    Find which card is at a position after the shuffle.
+    """
+    a, b = shuffle
+    return ((position - b) * pow(a, -1, deck_size)) % deck_size
+
+
+def get_deck(shuffle, deck_size):
+    """
+    Materialize the shuffled deck, the products fit in int64 for decks of up
+    to about 3 billion cards.
+    """
+    a, b = shuffle
+    a_inverse = pow(a, -1, deck_size)
+    positions = np.arange(deck_size, dtype=np.int64)
+    return ((positions - b) % deck_size * a_inverse) % deck_size
+
+
+class Deck:
+    """
+    This class shuffles a materialized deck of int64 cards.  Each technique
+    gathers from one buffer into the other and the buffers are swapped, so no
+    arrays are allocated per technique.  deck[position] is the card at the
+    position.
+    """
+
+    def __init__(self, deck_size):
+        self.deck_size = deck_size
+        self.positions = np.arange(deck_size, dtype=np.int64)
+        self.deck = self.positions.copy()
+        self.buffer = np.empty_like(self.deck)
+        self.indices = np.empty_like(self.deck)
+        self.techniques = {
+            stack: self.stack,
+            cut: self.cut,
+            increment: self.increment,
+        }
+
+    def shuffle(self, actions, iterations=1):
+        """
+        Shuffle the deck once to find the shuffle as a permutation of
+        positions, then raise the permutation to the number of iterations by
+        squaring.
+        """
+        self.deck[:] = self.positions
+
+        for function, arg in actions:
+            self.techniques[function](arg)
+            self.deck, self.buffer = self.buffer, self.deck
+
+        self.power(iterations)
+        return self.deck
+
+    def stack(self, _):
+        self.buffer[:] = self.deck[::-1]
+
+    def cut(self, position):
+        position %= self.deck_size
+        self.buffer[: self.deck_size - position] = self.deck[position:]
+        self.buffer[self.deck_size - position :] = self.deck[:position]
+
+    def increment(self, interval):
+        np.multiply(self.positions, interval, out=self.indices)
+        np.remainder(self.indices, self.deck_size, out=self.indices)
+        self.buffer[self.indices] = self.deck
+
+    def power(self, iterations):
+        """
+        After a shuffle, the card at position p came from position deck[p].  A
+        second shuffle of the shuffled deck is deck[deck], so repeated
+        shuffles compose by gathering the permutation with itself.
+        """
+        permutation = self.deck.copy()
+        self.deck[:] = self.positions
+
+        while iterations > 0:
+            if iterations & 1:
+                np.take(self.deck, permutation, out=self.buffer)
+                self.deck, self.buffer = self.buffer, self.deck
+
+            np.take(permutation, permutation, out=self.indices)
+            permutation, self.indices = self.indices, permutation
+            iterations >>= 1
 
 
 def parse(lines):
@@ -100,7 +201,18 @@ def main(filename):
         3,
         6,
     ]
-    print(solve(parse(read_file(filename))).index(2019))
+    actions = parse(read_file("test_3.txt"))
+
+    for deck_size, iterations in ((10, 0), (10, 1), (10, 7), (10007, 1000)):
+        shuffle = get_shuffle(actions * iterations, deck_size)
+        deck = Deck(deck_size).shuffle(actions, iterations)
+        assert (deck == get_deck(shuffle, deck_size)).all()
+
+        for card in (0, 3, deck_size - 1):
+            position = get_position(shuffle, deck_size, card)
+            assert get_card(shuffle, deck_size, position) == deck[position] == card
+
+    print(get_position(get_shuffle(parse(read_file(filename)), 10007), 10007, 2019))
 
 
 if __name__ == "__main__":
@@ -2,64 +2,77 @@
 
 from collections import deque, defaultdict
 import numpy as np
-from sympy import *
 
 
 def solve(actions, deck_size=10007, position=2020, iterations=1):
+    return solve_batch(actions, deck_size, [position], iterations)[0]
+
+
+def solve_batch(actions, deck_size=10007, positions=(2020,), iterations=1):
     """
     - all of the shuffle operations can be expressed as addition or multiplication mod deck_size
     - the same holds true for the inverse shuffle operations
-    - a string expression is formed by applying the inverse shuffle operations in reverse order
-    - this gives an expression representing a single application of the inverse shuffle
+    - the inverse shuffle operations are composed in reverse order as integer pairs (a, b)
+    - this gives a single application of the inverse shuffle
         f(x) = a*x + b
 
-    - a and b are found by forming an expression using the shuffle steps and then simplifying with sympy
-    - we are applying the function recursively for each iteration, ex. two inverse shuffles
-        f(f(x))
+    - composing f with itself is also of this form, ex. two inverse shuffles
+        f(f(x)) = (a**2) * x + (a*b + b)
 
-    - for n applications of the inverse shuffle a geometric series is formed
-        (a**n) * x + (b * (a**n - 1) // (a - 1)) mod deck_size
-
-    - the division by (a-1) is replaced with the multiplicative inverse of (a-1) under deck size
+    - f is raised to the number of iterations by exponentiation by squaring
+    - every position is then looked up with the same (a, b) pair
     """
-    expression = get_expression(actions, deck_size, position, iterations)
-    expression = simplify(expression)
+    shuffle = get_inverse_shuffle(actions, deck_size)
+    a, b = repeat_shuffle(shuffle, deck_size, iterations)
+    positions = np.asarray(positions, dtype=object)
+    return (a * positions + b) % deck_size
 
-    x = symbols("x")
-    a = expression.coeff(x)
-    b = expression.coeff(x, 0)
 
-    a %= deck_size
-    b %= deck_size
+def get_inverse_shuffle(actions, deck_size=10007):
+    shuffle = (1, 0)
 
-    tmp_0 = pow(a, iterations, deck_size) * position
-    tmp_1 = (pow(a, iterations, deck_size) - 1) * pow(a - 1, -1, deck_size)
+    for function, arg in actions:
+        shuffle = function(deck_size, arg, shuffle)
 
-    result = tmp_0 + (b * tmp_1)
-    result %= deck_size
-    return result
+    return shuffle
+
+
+def repeat_shuffle(shuffle, deck_size, iterations):
+    """
+    Compose the shuffle with itself iterations times by squaring.
+    """
+    result = (1, 0)
 
+    while iterations > 0:
+        if iterations & 1:
+            result = compose(result, shuffle, deck_size)
 
-def get_expression(actions, deck_size=10007, position=2020, iterations=1):
-    expression = "x"
+        shuffle = compose(shuffle, shuffle, deck_size)
+        iterations >>= 1
 
-    for function, arg in actions:
-        expression = function(deck_size, arg, expression)
+    return result
 
-    return expression
+
+def compose(first, second, deck_size):
+    """
+    Return the shuffle applying first, then second.
+    """
+    a_0, b_0 = first
+    a_1, b_1 = second
+    return (a_1 * a_0) % deck_size, (a_1 * b_0 + b_1) % deck_size
 
 
-def inverse_increment(deck_size, interval, expression):
+def inverse_increment(deck_size, interval, shuffle):
     multiplicative_inverse = pow(interval, -1, deck_size)
-    return f"({expression}) * {multiplicative_inverse}"
+    return compose(shuffle, (multiplicative_inverse, 0), deck_size)
 
 
-def inverse_cut(deck_size, cut_position, expression):
-    return f"({expression}) + {cut_position}"
+def inverse_cut(deck_size, cut_position, shuffle):
+    return compose(shuffle, (1, cut_position), deck_size)
 
 
-def inverse_stack(deck_size, _, expression):
-    return f"-({expression}) - 1"
+def inverse_stack(deck_size, _, shuffle):
+    return compose(shuffle, (-1, -1), deck_size)
 
 
 def parse(lines):
@@ -1,46 +1,161 @@
 #!/usr/bin/env python3
 
-
 from re import match
+from bisect import bisect_left, bisect_right, insort
+from collections import defaultdict
+import numpy as np
 
+OFFSET = 2**30
 
-def solve(path_0, path_1):
-    coords_0 = get_coords(path_0)
-    coords_1 = get_coords(path_1)
-
-    intersections = coords_0 & coords_1
-    return find_closest(intersections)
 
+def solve(path_0, path_1):
+    intersections = get_intersections(get_segments(path_0), get_segments(path_1))
+    return min(get_distance(x, y) for x, y, _ in intersections if (x, y) != (0, 0))
+
+
+def solve_traced(path_0, path_1):
+    intersections = np.intersect1d(
+        get_cells(path_0), get_cells(path_1), assume_unique=True
+    )
+    x, y = unpack(intersections[intersections != pack(0, 0)])
+    return int((np.abs(x) + np.abs(y)).min())
+
+
+def get_segments(path):
+    """
+    Split the path into horizontal and vertical segments.  Each segment is
+    stored as (line, low, high, start, steps), where line is the fixed
+    coordinate, [low, high] is the range of the other coordinate, start is
+    where the segment begins along the range, and steps is the step count at
+    start.
+    """
+    horizontals = []
+    verticals = []
+    x, y, steps = 0, 0, 0
 
-def find_closest(coords):
-    distances = {get_distance(*coord) for coord in coords}
-    return min(distances)
+    for direction, distance in path:
+        dx, dy = get_delta(direction)
+        x_1, y_1 = x + dx * distance, y + dy * distance
+
+        if dy == 0:
+            horizontals.append((y, min(x, x_1), max(x, x_1), x, steps))
+
+        else:
+            verticals.append((x, min(y, y_1), max(y, y_1), y, steps))
+
+        x, y, steps = x_1, y_1, steps + distance
+
+    return horizontals, verticals
+
+
+def get_intersections(segments_0, segments_1):
+    """
+    Generate (x, y, steps) for the coordinates occupied by both wires, where
+    steps is the sum of the step counts of both wires.  Perpendicular segments
+    are crossed with a sweep line, collinear segments are overlapped.
+    """
+    horizontals_0, verticals_0 = segments_0
+    horizontals_1, verticals_1 = segments_1
+    yield from sweep(horizontals_0, verticals_1)
+    yield from sweep(horizontals_1, verticals_0)
+    yield from overlap(horizontals_0, horizontals_1)
+
+    for y, x, steps in overlap(verticals_0, verticals_1):
+        yield x, y, steps
+
+
+def sweep(horizontals, verticals):
+    """
+    Sweep a vertical line along x.  Horizontal segments are active while the
+    sweep line is within their range, and are kept sorted by y.  At each
+    vertical segment, the active horizontal segments within its y range are
+    crossings.  Segments starting at x are added before, and segments ending at
+    x are removed after, the vertical segments at x.
+    """
+    events = []
+
+    for idx, (_, low, high, _, _) in enumerate(horizontals):
+        events.append((low, 0, idx))
+        events.append((high, 2, idx))
+
+    for idx, vertical in enumerate(verticals):
+        events.append((vertical[0], 1, idx))
+
+    events.sort()
+    active = []
+
+    for x, event, idx in events:
+        if event == 0:
+            insort(active, (horizontals[idx][0], idx))
+
+        elif event == 2:
+            del active[bisect_left(active, (horizontals[idx][0], idx))]
+
+        else:
+            _, low, high, start, steps = verticals[idx]
+            lower = bisect_left(active, (low, -1))
+            upper = bisect_right(active, (high, len(horizontals)))
+
+            for y, horizontal_idx in active[lower:upper]:
+                _, _, _, horizontal_start, horizontal_steps = horizontals[
+                    horizontal_idx
+                ]
+                yield x, y, (
+                    steps
+                    + abs(y - start)
+                    + horizontal_steps
+                    + abs(x - horizontal_start)
+                )
+
+
+def overlap(segments_0, segments_1):
+    """
+    Overlap collinear segments on the same line.  Within an overlap, the
+    distance and step sum are minimized at an end of the overlap, at 0, or
+    next to the origin, so only those coordinates are generated.
+    """
+    lines = defaultdict(list)
+
+    for segment in segments_1:
+        lines[segment[0]].append(segment)
+
+    for line, low, high, start, steps in segments_0:
+        for _, low_1, high_1, start_1, steps_1 in lines[line]:
+            low_2, high_2 = max(low, low_1), min(high, high_1)
+
+            for along in {low_2, high_2, -1, 0, 1}:
+                if low_2 <= along <= high_2:
+                    yield along, line, (
+                        steps + abs(along - start) + steps_1 + abs(along - start_1)
+                    )
 
 
 def get_distance(x, y):
     return abs(x) + abs(y)
 
 
-def get_coords(path):
-    coords = set()
-    x, y = 0, 0
-
-    for direction, distance in path:
-        coords_, x, y = get_segment_coords(x, y, *get_delta(direction), distance)
-        coords |= coords_
-
-    return coords
+def get_cells(path):
+    """
+    Trace the path one cell at a time and return the sorted unique cells as
+    packed keys.  Each step repeats the delta of its segment, so the cells are
+    the cumulative sum of the repeated deltas.
+    """
+    deltas = np.array([get_delta(direction) for direction, _ in path], dtype=np.int64)
+    distances = np.array([distance for _, distance in path], dtype=np.int64)
+    x, y = np.repeat(deltas, distances, axis=0).cumsum(axis=0).T
+    return np.unique(pack(x, y))
 
 
-def get_segment_coords(x, y, dx, dy, distance):
-    coords = set()
+def pack(x, y):
+    """
+    Pack coordinates into int64 keys, each coordinate is offset to be
+    non-negative in 32 bits.
+    """
+    return (x + OFFSET) << 32 | (y + OFFSET)
 
-    for _ in range(distance):
-        x += dx
-        y += dy
-        coords.add((x, y))
 
-    return coords, x, y
+def unpack(keys):
+    return (keys >> 32) - OFFSET, (keys & 0xFFFFFFFF) - OFFSET
 
 
 def get_delta(direction):
@@ -86,8 +201,10 @@ def read_file(filename):
 
 
 def main(filename, expected=None):
-    result = solve(*parse(read_file(filename)))
+    paths = list(parse(read_file(filename)))
+    result = solve(*paths)
     print(result)
+    assert result == solve_traced(*paths)
     if expected is not None:
         assert result == expected
 
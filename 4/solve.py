@@ -1,39 +1,134 @@
 #!/usr/bin/env python3
 
-from numpy.lib.stride_tricks import sliding_window_view
+from functools import cache
+import numpy as np
+
+BLOCK_SIZE = 2**16
 
 
 def solve(range_start, range_end):
+    return count_valid(range_end) - count_valid(range_start - 1)
+
+
+def count_valid(number):
+    """
+    Count the valid numbers in [1, number] with digit dynamic programming.
+    Numbers with fewer digits are counted by their first digit.  Numbers with
+    the same number of digits are counted by walking the digits of number:
+    at every position, each smaller digit which keeps the prefix
+    non-decreasing is followed by any valid suffix.  The walk stops once the
+    prefix of number itself decreases.
+    """
+    if number < 1:
+        return 0
+
+    digits = split_number(number)
+    valid_count = 0
+
+    for length in range(1, len(digits)):
+        for first in range(1, 10):
+            valid_count += count_suffixes(length - 1, first, 1, False)
+
+    last, run, paired = 1, 0, False
+
+    for idx, digit in enumerate(digits):
+        remaining = len(digits) - idx - 1
+
+        for smaller in range(last, digit):
+            valid_count += count_suffixes(
+                remaining, smaller, *next_state(last, run, paired, smaller)
+            )
+
+        if digit < last:
+            return valid_count
+
+        run, paired = next_state(last, run, paired, digit)
+        last = digit
+
+    return valid_count + (paired or valid_run(run))
+
+
+def next_state(last, run, paired, digit):
+    """
+    Append a digit to a run of the last digit.  A different digit closes the
+    run.
+    """
+    if digit == last:
+        return run + 1, paired
+
+    return 1, paired or valid_run(run)
+
+
+@cache
+def count_suffixes(length, last, run, paired):
+    """
+    Count the non-decreasing suffixes of a length which make a valid number,
+    given the last digit, the length of its run, and whether a closed run
+    already satisfies the adjacency rule.
+    """
+    if length == 0:
+        return int(paired or valid_run(run))
+
+    suffix_count = 0
+
+    for digit in range(last, 10):
+        suffix_count += count_suffixes(
+            length - 1, digit, *next_state(last, run, paired, digit)
+        )
+
+    return suffix_count
+
+
+def valid_run(run):
+    """
+    The adjacency rule is met by a run of at least two equal digits.
+    """
+    return run >= 2
+
+
+def solve_vectorized(range_start, range_end):
+    """
+    Cross-check of solve, validating every number in the range in fixed-size
+    blocks.  Numbers of each length are validated separately so the digit
+    matrix has no leading zeros.
+    """
     valid_count = 0
 
-    for number in range(range_start, range_end + 1):
-        valid_count += valid(number)
+    for length in range(len(str(range_start)), len(str(range_end)) + 1):
+        start = max(range_start, 10 ** (length - 1))
+        end = min(range_end, 10**length - 1)
+
+        for block_start in range(start, end + 1, BLOCK_SIZE):
+            block_end = min(block_start + BLOCK_SIZE, end + 1)
+            numbers = np.arange(block_start, block_end, dtype=np.int64)
+            valid_count += int(valid_block(numbers, length).sum())
 
     return valid_count
 
 
 def valid(number):
-    return valid_adjacent(number) and valid_non_decreasing(number)
+    return bool(valid_block(np.array([number]), len(str(number)))[0])
 
 
-def valid_non_decreasing(number):
-    decreasing_count = 0
-    number = split_number(number)
+def valid_block(numbers, length):
+    differences = np.diff(split_numbers(numbers, length), axis=1)
+    return valid_adjacent(differences) & valid_non_decreasing(differences)
 
-    for digit_0, digit_1 in sliding_window_view(number, 2):
-        decreasing_count += digit_0 > digit_1
 
-    return decreasing_count == 0
+def valid_non_decreasing(differences):
+    return (differences >= 0).all(axis=1)
 
 
-def valid_adjacent(number):
-    adjacent_count = 0
-    number = split_number(number)
+def valid_adjacent(differences):
+    return (differences == 0).any(axis=1)
 
-    for digit_0, digit_1 in sliding_window_view(number, 2):
-        adjacent_count += digit_0 == digit_1
 
-    return adjacent_count > 0
+def split_numbers(numbers, length):
+    """
+    Return the digit matrix of shape (n-numbers, length).
+    """
+    powers = 10 ** np.arange(length - 1, -1, -1, dtype=np.int64)
+    return (numbers[:, None] // powers) % 10
 
 
 def split_number(number):
@@ -45,4 +140,5 @@ if __name__ == "__main__":
     assert valid(111111)
     assert not valid(223450)
     assert not valid(123789)
+    assert solve_vectorized(178416, 676461) == solve(178416, 676461)
     print(solve(178416, 676461))
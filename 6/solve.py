@@ -1,16 +1,58 @@
 #!/usr/bin/env python3
 
-import networkx as nx
+import numpy as np
 
 
-def solve(orbits):
-    graph = nx.DiGraph(orbits).reverse()
-    total = 0
+class OrbitMap:
+    """
+    This class indexes the orbits.  Bodies are interned to ints in topological
+    order, from COM outwards, so every body comes after the body it orbits.
+    parents[body] is the body it directly orbits, COM orbits itself.  The
+    depths, the number of direct and indirect orbits of each body, are then
+    computed in a single pass over the order.
+    """
+
+    def __init__(self, orbits):
+        centers = {body: center for center, body in orbits}
+        self.order = self.get_order(centers)
+        self.ids = {name: idx for idx, name in enumerate(self.order)}
+        parents = [self.ids[centers.get(name, name)] for name in self.order]
+        depths = [0] * len(self.order)
+
+        for body, parent in enumerate(parents):
+            if parent != body:
+                depths[body] = depths[parent] + 1
+
+        self.parents = np.array(parents, dtype=np.int64)
+        self.depths = np.array(depths, dtype=np.int64)
+
+    @staticmethod
+    def get_order(centers):
+        """
+        Depth first search from the bodies orbiting nothing, so every body
+        follows the body it orbits.
+        """
+        satellites = {}
+
+        for body, center in centers.items():
+            satellites.setdefault(center, []).append(body)
 
-    for _, length in nx.single_target_shortest_path_length(graph, "COM"):
-        total += length
+        pending = [center for center in satellites if center not in centers]
+        order = []
 
-    return total
+        while len(pending) > 0:
+            name = pending.pop()
+            order.append(name)
+            pending.extend(satellites.get(name, ()))
+
+        return order
+
+    def checksum(self):
+        return int(self.depths.sum())
+
+
+def solve(orbits):
+    return OrbitMap(orbits).checksum()
 
 
 def parse(lines):
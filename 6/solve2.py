@@ -1,11 +1,107 @@
 #!/usr/bin/env python3
 
-import networkx as nx
+import numpy as np
+
+
+class OrbitMap:
+    """
+    This class indexes the orbits.  Bodies are interned to ints in topological
+    order, from COM outwards, so every body comes after the body it orbits.
+    parents[body] is the body it directly orbits, COM orbits itself.  The
+    depths, the number of direct and indirect orbits of each body, are then
+    computed in a single pass over the order.
+
+    ancestors[level, body] is the body 2**level orbits inwards from body, so
+    the common ancestor of two bodies is found with O(log n) jumps.
+    """
+
+    def __init__(self, orbits):
+        centers = {body: center for center, body in orbits}
+        self.order = self.get_order(centers)
+        self.ids = {name: idx for idx, name in enumerate(self.order)}
+        parents = [self.ids[centers.get(name, name)] for name in self.order]
+        depths = [0] * len(self.order)
+
+        for body, parent in enumerate(parents):
+            if parent != body:
+                depths[body] = depths[parent] + 1
+
+        self.parents = np.array(parents, dtype=np.int64)
+        self.depths = np.array(depths, dtype=np.int64)
+        self.ancestors = self.get_ancestors()
+
+    @staticmethod
+    def get_order(centers):
+        """
+        Depth first search from the bodies orbiting nothing, so every body
+        follows the body it orbits.
+        """
+        satellites = {}
+
+        for body, center in centers.items():
+            satellites.setdefault(center, []).append(body)
+
+        pending = [center for center in satellites if center not in centers]
+        order = []
+
+        while len(pending) > 0:
+            name = pending.pop()
+            order.append(name)
+            pending.extend(satellites.get(name, ()))
+
+        return order
+
+    def get_ancestors(self):
+        """
+        Each level jumps twice as far by jumping twice on the previous level.
+        """
+        levels = max(1, int(self.depths.max()).bit_length())
+        ancestors = [self.parents]
+
+        for _ in range(1, levels):
+            ancestors.append(ancestors[-1][ancestors[-1]])
+
+        return np.stack(ancestors)
+
+    def common_ancestors(self, bodies_0, bodies_1):
+        """
+        Find the lowest common ancestor of each pair of bodies.  The deeper
+        body is lifted to the depth of the other, then both are lifted by the
+        largest jumps that keep them apart, leaving them just below the common
+        ancestor.
+        """
+        swap = self.depths[bodies_0] < self.depths[bodies_1]
+        bodies_0, bodies_1 = (
+            np.where(swap, bodies_1, bodies_0),
+            np.where(swap, bodies_0, bodies_1),
+        )
+        differences = self.depths[bodies_0] - self.depths[bodies_1]
+
+        for level, ancestors in enumerate(self.ancestors):
+            bodies_0 = np.where(differences >> level & 1, ancestors[bodies_0], bodies_0)
+
+        for ancestors in self.ancestors[::-1]:
+            ancestors_0 = ancestors[bodies_0]
+            ancestors_1 = ancestors[bodies_1]
+            apart = ancestors_0 != ancestors_1
+            bodies_0 = np.where(apart, ancestors_0, bodies_0)
+            bodies_1 = np.where(apart, ancestors_1, bodies_1)
+
+        return np.where(bodies_0 == bodies_1, bodies_0, self.parents[bodies_0])
+
+    def transfers(self, sources, targets):
+        """
+        Count the orbital transfers to move from the body each source orbits
+        to the body each target orbits.
+        """
+        centers_0 = self.parents[[self.ids[name] for name in sources]]
+        centers_1 = self.parents[[self.ids[name] for name in targets]]
+        common = self.common_ancestors(centers_0, centers_1)
+        return self.depths[centers_0] + self.depths[centers_1] - 2 * self.depths[common]
 
 
 def solve(orbits):
-    graph = nx.Graph(orbits)
-    return nx.shortest_path_length(graph, "YOU", "SAN") - 2
+    return int(OrbitMap(orbits).transfers(["YOU"], ["SAN"])[0])
 
 
 def parse(lines):
@@ -2,40 +2,60 @@
 
 import numpy as np
 
+CHUNK_LAYERS = 2**16
+
 
 def solve(image):
+    """
+    The per-layer digit counts are computed for a block of layers at a time
+    with a single bincount.  Each digit is offset by 10 * layer index so every
+    layer gets its own 10 bins.  The first layer with the fewest zeros in each
+    block is compared against the best layer found so far.  Only one block is
+    read from the memory-mapped image at a time.
+    """
     min_zeros = 2**32
-    min_layer = None
+    min_histogram = None
+
+    for start in range(0, image.shape[0], CHUNK_LAYERS):
+        histograms = get_histograms(image[start : start + CHUNK_LAYERS])
+        min_layer = histograms[:, 0].argmin()
 
-    for layer in image:
-        zero_count = (layer == 0).sum()
+        if histograms[min_layer, 0] < min_zeros:
+            min_histogram = histograms[min_layer]
+            min_zeros = min_histogram[0]
 
-        if zero_count < min_zeros:
-            min_layer = layer
-            min_zeros = zero_count
+    return min_histogram[1] * min_histogram[2]
 
-    one_count = (min_layer == 1).sum()
-    two_count = (min_layer == 2).sum()
-    return one_count * two_count
+
+def get_histograms(layers):
+    """
+    Return digit counts of shape (n-layers, 10) for layers of ASCII digits.
+    """
+    layers = layers.reshape((layers.shape[0], -1))
+    offsets = np.arange(0, 10 * layers.shape[0], 10, dtype=np.int64) - ord("0")
+    bins = (layers + offsets[:, None]).ravel()
+    histograms = np.bincount(bins, minlength=10 * layers.shape[0])
+    return histograms.reshape((-1, 10))
 
 
-def parse(data, width, height):
+def read_file(filename, width, height):
     """
-    Return image as numpy array of shape (n-layers, height, width).
+    Memory-map the file and return the ASCII digits as shape (n-layers, height,
+    width).  Trailing non-digit bytes (ex. a newline) are trimmed first, then
+    any trailing partial layer is ignored.
     """
-    digits = list(data.strip())
-    digits = list(map(int, digits))
-    image = np.array(digits)
-    return image.reshape((-1, height, width))
+    data = np.memmap(filename, dtype=np.uint8, mode="r")
+    end = data.shape[0]
 
+    while end > 0 and not ord("0") <= data[end - 1] <= ord("9"):
+        end -= 1
 
-def read_file(filename):
-    with open(filename, encoding="utf-8") as f_in:
-        return f_in.read()
+    n_layers = end // (width * height)
+    return data[: n_layers * width * height].reshape((n_layers, height, width))
 
 
 def main(filename, width, height, expected=None):
-    result = solve(parse(read_file(filename), width, height))
+    result = solve(read_file(filename, width, height))
     print(result)
     if expected is not None:
         assert result == expected
@@ -1,52 +1,72 @@
 #!/usr/bin/env python3
 
-from itertools import product
 import numpy as np
 
+TRANSPARENT = 2
+CHUNK_LAYERS = 2**10
+
 
 def solve(image):
-    rendered_image = np.zeros(shape=(image.shape[1:]), dtype=str)
+    """
+    Composite the layers front-to-back a chunk at a time from the
+    memory-mapped image.  Pixels which are still transparent are filled from
+    each chunk, and reading stops as soon as every pixel is opaque.
+    """
+    rendered_image = np.full(image.shape[1:], TRANSPARENT, dtype=np.uint8)
 
-    for y, x in product(range(image.shape[1]), range(image.shape[2])):
-        depth_slice = image[:, y, x]
-        depth_slice = depth_slice[depth_slice != 2]
-        rendered_image[y, x] = "#" if depth_slice[0] == 1 else " "
+    for start in range(0, image.shape[0], CHUNK_LAYERS):
+        chunk = image[start : start + CHUNK_LAYERS] - ord("0")
+        transparent = rendered_image == TRANSPARENT
+        rendered_image[transparent] = composite(chunk)[transparent]
 
-    print(image_str(rendered_image))
+        if not (rendered_image == TRANSPARENT).any():
+            break
 
+    return image_str(rendered_image)
 
-def image_str(image):
-    image_string = ""
 
-    for row in image:
-        for element in row:
-            image_string += element
-        image_string += "\n"
-    return image_string
+def composite(image):
+    """
+    Find the first non-transparent layer of every pixel at once.  Pixels which
+    are transparent in every layer remain transparent.
+    """
+    first_opaque = (image != TRANSPARENT).argmax(axis=0)
+    return np.take_along_axis(image, first_opaque[None], axis=0)[0]
+
+
+def image_str(image):
+    """
+    Render the image as '#' for white and ' ' otherwise, with a newline after
+    every row.
+    """
+    pixels = np.where(image == 1, ord("#"), ord(" ")).astype(np.uint8)
+    newlines = np.full((image.shape[0], 1), ord("\n"), dtype=np.uint8)
+    return np.hstack((pixels, newlines)).tobytes().decode()
 
 
-def parse(data, width, height):
+def read_file(filename, width, height):
     """
-    Return image as numpy array of shape (n-layers, height, width).
+    Memory-map the file and return the ASCII digits as shape (n-layers, height,
+    width).  Trailing non-digit bytes (ex. a newline) are trimmed first, then
+    any trailing partial layer is ignored.
     """
-    digits = list(data.strip())
-    digits = list(map(int, digits))
-    image = np.array(digits)
-    return image.reshape((-1, height, width))
+    data = np.memmap(filename, dtype=np.uint8, mode="r")
+    end = data.shape[0]
 
+    while end > 0 and not ord("0") <= data[end - 1] <= ord("9"):
+        end -= 1
 
-def read_file(filename):
-    with open(filename, encoding="utf-8") as f_in:
-        return f_in.read()
+    n_layers = end // (width * height)
+    return data[: n_layers * width * height].reshape((n_layers, height, width))
 
 
 def main(filename, width, height, expected=None):
-    result = solve(parse(read_file(filename), width, height))
+    result = solve(read_file(filename, width, height))
     print(result)
     if expected is not None:
         assert result == expected
 
 
 if __name__ == "__main__":
-    main("test2.txt", 2, 2)
+    main("test2.txt", 2, 2, " #\n# \n")
     main("input.txt", 25, 6)